@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+# The packages under src/ only import once it is on sys.path.
+# pylint: disable=wrong-import-position,wrong-import-order
+from analysis import TextAnalyzer, WordCountStore
+from scraper import StardewScraper
+from utils import ConfigLoader
+from wiki_server import SyntheticWiki, WikiServer
+from wikiscraper import crawl_subpages
+
+# pylint: enable=wrong-import-position,wrong-import-order
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+class TimedScraper(StardewScraper):
+    def __init__(self, config, timings: dict[str, list[float]]):
+        super().__init__(config)
+        self.timings = timings
+
+    def fetch_page(self, subpage: str) -> str:
+        start = time.perf_counter()
+        try:
+            return super().fetch_page(subpage)
+        finally:
+            self.timings["fetch"].append(time.perf_counter() - start)
+
+    def extractor(self):
+        extract, timings = super().extractor(), self.timings
+
+        def timed_extract(html: str):
+            start = time.perf_counter()
+            try:
+                return extract(html)
+            finally:
+                timings["extract"].append(time.perf_counter() - start)
+
+        return timed_extract
+
+
+def make_config(workdir: Path, **overrides) -> ConfigLoader:
+    config_path = workdir / "config.json"
+    config_path.write_text(json.dumps({"request_timeout": 30, "max_retries": 0, **overrides}))
+    return ConfigLoader(config_path, keys_path=workdir / ".env")
+
+
+def bench_crawl(args, workdir: Path) -> dict:
+    wiki = SyntheticWiki(args.pages, args.links, args.paragraphs, args.seed)
+    timings: dict[str, list[float]] = defaultdict(list)
+
+    with WikiServer(wiki, latency=args.latency) as server:
+        config = make_config(workdir, wiki_url=server.url, pool_size=max(10, args.workers))
+        scraper = TimedScraper(config, timings)
+
+        with WordCountStore(workdir / "bench.sqlite") as store:
+            original_set_page = store.set_page
+
+            def timed_set_page(title, counts, **kwargs):
+                start = time.perf_counter()
+                changed = original_set_page(title, counts, **kwargs)
+                timings["aggregate"].append(time.perf_counter() - start)
+                return changed
+
+            store.set_page = timed_set_page
+            start = time.perf_counter()
+            # Crawl progress goes to stderr so stdout stays machine-readable.
+            with contextlib.redirect_stdout(sys.stderr):
+                crawl_subpages(
+                    wiki.title(0), args.depth, 0, scraper, workdir / "word-counts.json",
+                    limit=args.limit, workers=args.workers, store=store,
+                )
+            elapsed = time.perf_counter() - start
+            vocabulary = len(store.to_frame())
+
+        pages = len(timings["fetch"])
+        return {
+            "pages": pages,
+            "seconds": elapsed,
+            "pages_per_second": pages / elapsed if elapsed else None,
+            "bytes_on_wire": server.bytes_sent,
+            "requests": server.requests,
+            "vocabulary": vocabulary,
+            "stages": {stage: percentiles(samples) for stage, samples in timings.items()},
+        }
+
+
+def bench_extractors(args, workdir: Path) -> dict:
+    wiki = SyntheticWiki(args.pages, args.links, args.paragraphs, args.seed)
+    scraper = StardewScraper(make_config(workdir))
+    pages = [wiki.render(i) for i in range(min(args.pages, args.samples))]
+    timings: dict[str, list[float]] = defaultdict(list)
+
+    def timed(name, fn, *fn_args):
+        start = time.perf_counter()
+        result = fn(*fn_args)
+        timings[name].append(time.perf_counter() - start)
+        return result
+
+    json_path = workdir / "legacy-word-counts.json"
+    with WordCountStore(workdir / "extractors.sqlite") as store:
+        for html in pages:
+            page = timed("parse_page", scraper.parse_page, html)
+            words = timed("extract_all_words", scraper.extract_all_words, page)
+            timed("count_all_words", scraper.count_all_words, page)
+            timed("extract_tables", scraper.extract_tables, page)
+            timed("fetch_page_redirections", scraper.fetch_page_redirections, page)
+            timed("scan_links", scraper.fetch_page_redirections, html)
+            frame = TextAnalyzer.sum_word_occurrences(words)
+            timed("update_word_counts_json", TextAnalyzer.update_word_counts_json, frame, json_path)
+            timed("word_store_add", store.add_frame, frame)
+        timed("word_store_flush", store.flush)
+
+    return {name: percentiles(samples) for name, samples in timings.items()}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    # Ratios of this run to the baseline run: > 1 means slower for latencies, faster for throughput.
+    ratios = {}
+    for name, stats in results["extractors"].items():
+        base = baseline.get("extractors", {}).get(name)
+        if base and base.get("p50_ms"):
+            ratios[f"extractors.{name}.p50_ms"] = stats["p50_ms"] / base["p50_ms"]
+    crawl, base_crawl = results.get("crawl"), baseline.get("crawl")
+    if crawl and base_crawl and base_crawl.get("pages_per_second"):
+        ratios["crawl.pages_per_second"] = (
+            crawl["pages_per_second"] / base_crawl["pages_per_second"]
+        )
+        ratios["crawl.bytes_on_wire"] = (
+            crawl["bytes_on_wire"] / max(1, base_crawl["bytes_on_wire"])
+        )
+    return ratios
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark crawls against a local synthetic wiki."
+    )
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic wiki.")
+    parser.add_argument("--links", type=int, default=15, help="Outgoing links per page.")
+    parser.add_argument(
+        "--paragraphs", type=int, default=20, help="Paragraphs per page (page weight)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic wiki.")
+    parser.add_argument("--depth", type=int, default=3, help="Crawl depth.")
+    parser.add_argument(
+        "--limit", type=int, default=0, help="Maximum pages to crawl (0: no limit)."
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent fetches.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency (s).")
+    parser.add_argument(
+        "--samples", type=int, default=50, help="Pages used by extractor benchmarks."
+    )
+    parser.add_argument("--skip-crawl", action="store_true", help="Only run extractor benchmarks.")
+    parser.add_argument("--output", type=str, help="Write JSON results to this path.")
+    parser.add_argument(
+        "--compare", type=str, help="JSON results of a previous run to compare against."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        results = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "params": vars(args),
+            "extractors": bench_extractors(args, workdir),
+        }
+        if not args.skip_crawl:
+            results["crawl"] = bench_crawl(args, workdir)
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results["peak_rss_mb"] = peak_rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        results["compared_to"] = compare(results, baseline)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "seaborn", "wordfreq")
+PROBE = (
+    "import sys, wikiscraper.main; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def run_probe(extra_flags: list[str]) -> subprocess.CompletedProcess:
+    pythonpath = os.pathsep.join([str(ROOT / "src"), os.environ.get("PYTHONPATH", "")])
+    return subprocess.run(
+        [sys.executable, *extra_flags, "-c", PROBE],
+        env={**os.environ, "PYTHONPATH": pythonpath}, capture_output=True, text=True, check=True,
+    )
+
+
+def slowest_imports(importtime_log: str, top: int) -> list[dict]:
+    # `-X importtime` lines look like "import time:  self [us] | cumulative | name".
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = (field.strip() for field in fields)
+        rows.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return sorted(rows, key=lambda row: row["self_ms"], reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure the start-up cost of the wikiscraper CLI."
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Number of cold interpreter starts.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list.")
+    parser.add_argument(
+        "--budget", type=float, default=0.5, help="Fail if the median start exceeds this (s)."
+    )
+    parser.add_argument("--output", type=str, help="Write JSON results to this path.")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        probe = run_probe([])
+        timings.append(time.perf_counter() - start)
+
+    results = {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "heavy_modules_loaded": [m for m in probe.stdout.strip().split(",") if m],
+        "slowest_imports": slowest_imports(run_probe(["-X", "importtime"]).stderr, args.top),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    print(output)
+    if results["heavy_modules_loaded"] or results["median_s"] > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SyntheticWiki:
+    # A deterministic MediaWiki-like link graph: `pages` articles named Page_00000..., each with
+    # `paragraphs` of prose, one wikitable and `links` outgoing article links.
+    def __init__(self, pages: int = 500, links: int = 20, paragraphs: int = 20, seed: int = 0):
+        self.pages = pages
+        self.links = links
+        self.paragraphs = paragraphs
+        self.seed = seed
+        rng = random.Random(seed)
+        self.vocabulary = [
+            "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 10)))
+            for _ in range(5000)
+        ]
+
+    def title(self, index: int) -> str:
+        return f"Page_{index:05d}"
+
+    def render(self, index: int) -> str:
+        rng = random.Random(self.seed * 1_000_003 + index)
+        targets = [self.title(rng.randrange(self.pages)) for _ in range(self.links)]
+        words = self.vocabulary
+
+        body = []
+        for p in range(self.paragraphs):
+            sentence = " ".join(rng.choices(words, k=rng.randint(40, 120)))
+            link = targets[p % len(targets)] if targets else None
+            anchor = ""
+            if link:
+                anchor = f' <a href="/{link}" title="{link}">{link.replace("_", " ")}</a>'
+            body.append(f"<p>{sentence.capitalize()}.{anchor}</p>")
+        body.extend(f'<a href="/{target}">{target}</a>' for target in targets)
+        body.append('<a href="/File:Icon.png">icon</a><a href="/Category:Items">items</a>')
+        rows = "".join(
+            f"<tr><td>{rng.choice(words)}</td><td>{rng.randint(1, 1000)}</td></tr>"
+            for _ in range(10)
+        )
+        body.append(f'<table class="wikitable"><tr><th>Name</th><th>Price</th></tr>{rows}</table>')
+
+        title = self.title(index)
+        return (
+            f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f'<div id="mw-navigation"><a href="/Main_Page">Main Page</a></div>'
+            f'<div id="content"><h1>{title}</h1><div id="mw-content-text">'
+            f'<div class="mw-parser-output">{"".join(body)}</div></div></div></body></html>'
+        )
+
+    def index_of(self, path: str) -> int | None:
+        name = path.lstrip("/")
+        if not name.startswith("Page_"):
+            return None
+        try:
+            index = int(name[5:])
+        except ValueError:
+            return None
+        return index if 0 <= index < self.pages else None
+
+
+class WikiServer:
+    def __init__(self, wiki: SyntheticWiki, latency: float = 0.0):
+        self.wiki = wiki
+        self.latency = latency
+        self.bytes_sent = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def record_response(self, size: int) -> None:
+        with self._lock:
+            self.bytes_sent += size
+            self.requests += 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                index = server.wiki.index_of(self.path)
+                status = 200 if index is not None else 404
+                body = (server.wiki.render(index) if index is not None else "not found").encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.record_response(len(body))
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def __enter__(self) -> WikiServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -1,3 +1,22 @@
-from .text_analyzer import TextAnalyzer
+from typing import TYPE_CHECKING
 
-__all__ = ["TextAnalyzer"]
+from .word_store import WordCountStore
+
+if TYPE_CHECKING:
+    from .lang_freq import LanguageFrequencies
+    from .text_analyzer import TextAnalyzer
+
+__all__ = ["LanguageFrequencies", "TextAnalyzer", "WordCountStore"]
+
+
+def __getattr__(name: str):
+    # These pull in pandas and numpy; they are only loaded by the commands that analyze counts.
+    if name == "TextAnalyzer":
+        from .text_analyzer import TextAnalyzer
+
+        return TextAnalyzer
+    if name == "LanguageFrequencies":
+        from .lang_freq import LanguageFrequencies
+
+        return LanguageFrequencies
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
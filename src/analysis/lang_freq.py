@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Iterable
+from importlib.metadata import version
+from pathlib import Path
+
+import numpy as np
+
+from utils.metrics import metrics
+
+# Words wordfreq would tokenize or smash differently than a plain dictionary lookup.
+_NEEDS_TOKENIZER = re.compile(r"[\d\W_]")
+
+
+class LanguageFrequencies:
+    # A language's wordfreq list as a sorted, fixed-width UTF-8 array with matching frequencies,
+    # so looking up a whole vocabulary is one searchsorted instead of a call per word.
+    def __init__(self, lang: str, words: np.ndarray, freqs: np.ndarray, wordlist: str = "best"):
+        self.lang = lang
+        self.wordlist = wordlist
+        self.words = words
+        self.freqs = freqs
+
+    @classmethod
+    @metrics.timed("build_lang_freq")
+    def build(cls, lang: str, wordlist: str = "best") -> LanguageFrequencies:
+        from wordfreq import get_frequency_dict
+
+        table = get_frequency_dict(lang, wordlist)
+        words = np.array([word.encode("utf-8") for word in table], dtype=np.bytes_)
+        freqs = _round_freqs(np.fromiter(table.values(), dtype=np.float64, count=len(table)))
+        order = np.argsort(words, kind="stable")
+        return cls(lang, words[order], freqs[order], wordlist)
+
+    @classmethod
+    def load(
+        cls, lang: str, table_dir: Path | None = None, wordlist: str = "best"
+    ) -> LanguageFrequencies:
+        if table_dir is None:
+            return cls.build(lang, wordlist)
+
+        table_dir = Path(table_dir)
+        name = f"{lang}-{wordlist}-wordfreq{version('wordfreq')}"
+        words_path, freqs_path = table_dir / f"{name}.words.npy", table_dir / f"{name}.freqs.npy"
+        if words_path.exists() and freqs_path.exists():
+            words = np.load(words_path, mmap_mode="r")
+            return cls(lang, words, np.load(freqs_path, mmap_mode="r"), wordlist)
+
+        table = cls.build(lang, wordlist)
+        table_dir.mkdir(parents=True, exist_ok=True)
+        # Frequencies first: a words file on disk implies the table is complete.
+        for path, array in ((freqs_path, table.freqs), (words_path, table.words)):
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @metrics.timed("lookup_lang_freq")
+    def lookup(self, words: Iterable[str]) -> np.ndarray:
+        words = list(words)
+        if not words:
+            return np.zeros(0, dtype=np.float64)
+
+        words = _normalize(words, self.lang)
+        keys = np.array([word.encode("utf-8") for word in words], dtype=np.bytes_)
+        # Searching in sorted order walks the table once instead of jumping around it.
+        order = np.argsort(keys, kind="stable")
+        positions = np.empty(len(keys), dtype=np.intp)
+        positions[order] = np.searchsorted(self.words, keys[order])
+        positions = positions.clip(max=len(self.words) - 1)
+        found = self.words[positions] == keys
+        freqs = np.where(found, self.freqs[positions], 0.0)
+
+        # Numbers and punctuated words need wordfreq's tokenizer; there are few of them,
+        # so they are looked up one by one.
+        fallback = [i for i in np.flatnonzero(~found) if _NEEDS_TOKENIZER.search(words[i])]
+        if fallback:
+            from wordfreq import word_frequency
+
+            freqs[fallback] = [word_frequency(words[i], self.lang, self.wordlist) for i in fallback]
+        return freqs
+
+
+def _normalize(words: list[str], lang: str) -> list[str]:
+    # The table holds wordfreq's normalized forms (casefolded, NFKC, ß as ss, ...), so keys are
+    # normalized the same way. Lowercase ASCII words are already normalized and skip the work.
+    if all(_is_normalized(word) for word in words):
+        return words
+
+    import langcodes
+    from wordfreq.preprocess import preprocess_text
+
+    language = langcodes.get(lang)
+    return [word if _is_normalized(word) else preprocess_text(word, language) for word in words]
+
+
+def _is_normalized(word: str) -> bool:
+    return word.isascii() and word == word.lower()
+
+
+def _round_freqs(freqs: np.ndarray) -> np.ndarray:
+    # Same 3-significant-digit rounding that wordfreq.word_frequency applies.
+    scale = 10.0 ** (np.floor(-np.log10(freqs)) + 3)
+    return np.round(freqs * scale) / scale
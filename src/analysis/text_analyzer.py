@@ -2,10 +2,10 @@ import os
 from pathlib import Path
 
 import pandas as pd
-from matplotlib import pyplot as plt
-from wordfreq import top_n_list
-from wordfreq import word_frequency
-import seaborn as sns
+
+from utils.metrics import metrics
+
+from .word_store import WordCountStore
 
 
 class TextAnalyzer:
@@ -16,6 +16,7 @@ class TextAnalyzer:
         return frequency_table
 
     @staticmethod
+    @metrics.timed("update_word_counts_json")
     def update_word_counts_json(word_counts: pd.DataFrame, file_path: Path) -> None:
         if os.path.exists(file_path):
             word_counts = pd.concat([pd.read_json(file_path), word_counts])
@@ -26,12 +27,26 @@ class TextAnalyzer:
             word_counts.to_json(file_path, orient="records")
 
     @staticmethod
-    def analyze_rel_word_freq(mode: str, count: int, lang: str, json_path: Path) -> pd.DataFrame:
-        path = Path(json_path)
+    def load_word_counts(counts_path: Path) -> pd.DataFrame:
+        path = Path(counts_path)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {path}")
 
-        df_json = pd.read_json(path)
+        if path.suffix == ".json":
+            return pd.read_json(path)
+        with WordCountStore(path) as store:
+            return store.to_frame()
+
+    @staticmethod
+    @metrics.timed("analyze_rel_word_freq")
+    def analyze_rel_word_freq(
+        mode: str, count: int, lang: str, counts_path: Path, table_dir: Path | None = None
+    ) -> pd.DataFrame:
+        from wordfreq import top_n_list
+
+        from .lang_freq import LanguageFrequencies
+
+        df_json = TextAnalyzer.load_word_counts(counts_path)
         df_json = df_json[['word', 'wiki freq']].set_index('word')
 
         if mode == "article":
@@ -42,7 +57,7 @@ class TextAnalyzer:
         df = pd.DataFrame({'word': target_words})
 
         df['wiki freq'] = df['word'].map(df_json['wiki freq']).fillna(0)
-        df['lang freq'] = [word_frequency(w, lang) for w in df['word']]
+        df['lang freq'] = LanguageFrequencies.load(lang, table_dir).lookup(df['word'])
 
         for col in ['wiki freq', 'lang freq']:
             max_val = df[col].max()
@@ -55,6 +70,9 @@ class TextAnalyzer:
 
     @staticmethod
     def plot_rel_word_freq(df: pd.DataFrame, chart_path: Path):
+        import seaborn as sns
+        from matplotlib import pyplot as plt
+
         df_melted = df.melt(id_vars=['word'], value_vars=['wiki freq', 'lang freq'],
                             var_name='source', value_name='frequency')
 
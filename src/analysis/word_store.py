@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import Counter
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def counts_digest(counts: Mapping[str, int]) -> bytes:
+    # Order-independent, so equal counts always hash alike whatever order the words came in.
+    items = sorted((word, int(count)) for word, count in counts.items() if count)
+    encoded = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+class WordCountStore:
+    def __init__(self, path: Path, *, batch_size: int = 50_000, page_batch_size: int = 1_000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.page_batch_size = page_batch_size
+        self._pending: Counter = Counter()
+        # Page records not written yet: (digest, revision, counts), or None for a removed page.
+        self._pending_pages: dict[str, tuple[bytes, int | None, Counter] | None] = {}
+        self._lock = threading.RLock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS word_counts ("
+            "word TEXT PRIMARY KEY, count INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        # What each page contributed to word_counts, written in the same transaction as the
+        # counts, so recounting a page replaces its old counts instead of adding to them.
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS page_counts ("
+            "title TEXT PRIMARY KEY, digest BLOB NOT NULL, revision INTEGER, counts TEXT NOT NULL) "
+            "WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_json(cls, json_path: Path, store_path: Path | None = None) -> WordCountStore:
+        # Seeds a fresh store from a legacy word-counts.json so existing totals carry over.
+        store_path = Path(store_path) if store_path else Path(json_path).with_suffix(".sqlite")
+        is_new = not store_path.exists()
+        store = cls(store_path)
+        if is_new and Path(json_path).exists():
+            store.import_json(json_path)
+        return store
+
+    def __enter__(self) -> WordCountStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, counts: Mapping[str, int]) -> None:
+        with self._lock:
+            self._pending.update(counts)
+            self._flush_if_full()
+
+    def add_frame(self, word_counts: pd.DataFrame) -> None:
+        self.add(dict(zip(word_counts['word'], word_counts['wiki freq'].astype(int))))
+
+    def set_page(
+        self, title: str, counts: Mapping[str, int], *, revision: int | None = None
+    ) -> bool:
+        # Makes `counts` the page's contribution, applying only the difference to what was counted
+        # for it before. Returns whether the counts changed.
+        with self._lock:
+            digest = counts_digest(counts)
+            old = self._page(title)
+            if old is not None and old[0] == digest:
+                if revision is not None and revision != old[1]:
+                    self._pending_pages[title] = (digest, revision, old[2])
+                return False
+            self._pending.update(counts)
+            if old is not None:
+                self._pending.subtract(old[2])
+            self._pending_pages[title] = (digest, revision, Counter(counts))
+            self._flush_if_full()
+            return True
+
+    def remove_page(self, title: str) -> bool:
+        with self._lock:
+            old = self._page(title)
+            if old is None:
+                return False
+            self._pending.subtract(old[2])
+            self._pending_pages[title] = None
+            self._flush_if_full()
+            return True
+
+    def page_revision(self, title: str) -> int | None:
+        with self._lock:
+            page = self._page(title)
+            return page[1] if page is not None else None
+
+    def page_records(self) -> Iterator[tuple[str, int | None]]:
+        # Streams (title, revision) of every counted page; nothing may be added until it is
+        # consumed.
+        self.flush()
+        return iter(self._conn.execute("SELECT title, revision FROM page_counts ORDER BY title"))
+
+    def _page(self, title: str) -> tuple[bytes, int | None, Counter] | None:
+        if title in self._pending_pages:
+            return self._pending_pages[title]
+        row = self._conn.execute(
+            "SELECT digest, revision, counts FROM page_counts WHERE title = ?", (title,)
+        ).fetchone()
+        return (row[0], row[1], Counter(json.loads(row[2]))) if row else None
+
+    def _flush_if_full(self) -> None:
+        if (
+            len(self._pending) >= self.batch_size
+            or len(self._pending_pages) >= self.page_batch_size
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending and not self._pending_pages:
+                return
+            with metrics.timer("word_store_flush"), self._conn:
+                self._conn.executemany(
+                    "INSERT INTO word_counts (word, count) VALUES (?, ?) "
+                    "ON CONFLICT(word) DO UPDATE SET count = count + excluded.count",
+                    ((word, int(count)) for word, count in self._pending.items() if count),
+                )
+                if any(count < 0 for count in self._pending.values()):
+                    self._conn.execute("DELETE FROM word_counts WHERE count <= 0")
+                self._conn.executemany(
+                    "DELETE FROM page_counts WHERE title = ?",
+                    ((title,) for title, page in self._pending_pages.items() if page is None),
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO page_counts (title, digest, revision, counts) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (title, page[0], page[1], json.dumps(page[2], ensure_ascii=False))
+                        for title, page in self._pending_pages.items() if page is not None
+                    ),
+                )
+            self._pending.clear()
+            self._pending_pages.clear()
+
+    def to_frame(self) -> pd.DataFrame:
+        self.flush()
+        rows = self._conn.execute(
+            "SELECT word, count FROM word_counts ORDER BY count DESC, word"
+        ).fetchall()
+        import pandas as pd
+
+        return pd.DataFrame(rows, columns=['word', 'wiki freq'])
+
+    def import_json(self, json_path: Path) -> None:
+        import pandas as pd
+
+        self.add_frame(pd.read_json(json_path))
+        self.flush()
+
+    def export_json(self, json_path: Path) -> None:
+        json_path = Path(json_path)
+        fd, tmp_path = tempfile.mkstemp(dir=json_path.parent, prefix=json_path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                self.to_frame().to_json(f, orient="records")
+            os.replace(tmp_path, json_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,59 @@
+from typing import TYPE_CHECKING
+
+from .aliases import AliasMap
+from .engine import ConcurrentCrawler, rps_from_wait
+from .frontier import (
+    FRONTIER_STRATEGIES,
+    BloomFilter,
+    BreadthFirstFrontier,
+    DiskSeenSet,
+    Frontier,
+    InLinkFrontier,
+    SeenSet,
+    make_frontier,
+)
+from .journal import CrawlJournal
+from .rate_limit import HostRateLimiter, TokenBucket
+from .work_queue import (
+    WORK_QUEUE_BACKENDS,
+    CompletedPage,
+    SqliteWorkQueue,
+    WorkQueue,
+    make_work_queue,
+)
+
+if TYPE_CHECKING:
+    from .link_graph import LinkGraph, LinkGraphStore
+
+__all__ = [
+    "AliasMap",
+    "BloomFilter",
+    "BreadthFirstFrontier",
+    "CompletedPage",
+    "ConcurrentCrawler",
+    "CrawlJournal",
+    "DiskSeenSet",
+    "FRONTIER_STRATEGIES",
+    "Frontier",
+    "HostRateLimiter",
+    "InLinkFrontier",
+    "LinkGraph",
+    "LinkGraphStore",
+    "SeenSet",
+    "SqliteWorkQueue",
+    "TokenBucket",
+    "WORK_QUEUE_BACKENDS",
+    "WorkQueue",
+    "make_frontier",
+    "make_work_queue",
+    "rps_from_wait",
+]
+
+
+def __getattr__(name: str):
+    # The link graph needs numpy; it is only loaded by the commands that build or query it.
+    if name in ("LinkGraph", "LinkGraphStore"):
+        from . import link_graph
+
+        return getattr(link_graph, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
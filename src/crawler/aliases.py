@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from scraper.fingerprint import hamming
+
+# SimHash fingerprints at most this many bits apart are near-duplicates. With four 16-bit bands,
+# two such fingerprints always share at least one band exactly, which is what lookups index on.
+MAX_DISTANCE = 3
+_BANDS = 4
+
+
+def _bands(fingerprint: int) -> list[tuple[int, int]]:
+    unsigned = fingerprint & 0xFFFFFFFFFFFFFFFF
+    return [(band, (unsigned >> (16 * band)) & 0xFFFF) for band in range(_BANDS)]
+
+
+def _signed(fingerprint: int) -> int:
+    unsigned = fingerprint & 0xFFFFFFFFFFFFFFFF
+    return unsigned - (1 << 64) if unsigned >= 1 << 63 else unsigned
+
+
+class AliasMap:
+    # Persistent map from every title a page was reached under to its canonical title, so that
+    # aliases and redirects are resolved before they are queued. Also keeps, per crawl run, the
+    # SimHash of every counted page to recognise pages already counted under another name.
+    def __init__(self, path: Path | str = ":memory:", *, max_distance: int = MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            "title TEXT PRIMARY KEY, canonical TEXT NOT NULL) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "run TEXT NOT NULL, title TEXT NOT NULL, simhash INTEGER, "
+            "PRIMARY KEY (run, title)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS bands ("
+            "run TEXT NOT NULL, band INTEGER NOT NULL, value INTEGER NOT NULL, "
+            "title TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS bands_by_value ON bands (run, band, value);"
+        )
+        self._conn.commit()
+        rows = self._conn.execute("SELECT title, canonical FROM aliases")
+        self._aliases: dict[str, str] = dict(rows)
+
+    def __enter__(self) -> AliasMap:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def resolve(self, title: str) -> str:
+        seen = {title}
+        while title in self._aliases:
+            title = self._aliases[title]
+            if title in seen:
+                break
+            seen.add(title)
+        return title
+
+    def add_alias(self, title: str, canonical: str) -> None:
+        if title == canonical or self._aliases.get(title) == canonical:
+            return
+        with self._lock:
+            self._aliases[title] = canonical
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aliases (title, canonical) VALUES (?, ?)",
+                (title, canonical),
+            )
+
+    def counted(self, run: str, title: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM fingerprints WHERE run = ? AND title = ?", (run, title)
+            ).fetchone() is not None
+
+    def duplicate_of(self, run: str, title: str, fingerprint: int | None) -> str | None:
+        # The title of a page already counted in this run that `title` duplicates, if any.
+        with self._lock:
+            if self.counted(run, title):
+                return title
+            if fingerprint is None:
+                return None
+            unsigned = fingerprint & 0xFFFFFFFFFFFFFFFF
+            for band, value in _bands(fingerprint):
+                rows = self._conn.execute(
+                    "SELECT f.title, f.simhash FROM bands b JOIN fingerprints f "
+                    "ON f.run = b.run AND f.title = b.title "
+                    "WHERE b.run = ? AND b.band = ? AND b.value = ?",
+                    (run, band, value),
+                )
+                for other, simhash in rows:
+                    if hamming(simhash & 0xFFFFFFFFFFFFFFFF, unsigned) <= self.max_distance:
+                        return other
+            return None
+
+    def add_fingerprint(self, run: str, title: str, fingerprint: int | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO fingerprints (run, title, simhash) VALUES (?, ?, ?)",
+                (run, title, None if fingerprint is None else _signed(fingerprint)),
+            )
+            if fingerprint is not None:
+                self._conn.executemany(
+                    "INSERT INTO bands (run, band, value, title) VALUES (?, ?, ?, ?)",
+                    ((run, band, value, title) for band, value in _bands(fingerprint)),
+                )
+
+    def forget_run(self, run: str) -> None:
+        # Aliases outlive the run; fingerprints only guard one crawl against counting a page twice.
+        with self._lock:
+            self._conn.execute("DELETE FROM fingerprints WHERE run = ?", (run,))
+            self._conn.execute("DELETE FROM bands WHERE run = ?", (run,))
+            self._conn.commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
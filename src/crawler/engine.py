@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from itertools import islice
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import TypeVar
+from urllib.parse import urlparse
+
+from scraper import PageExtract, PageNotFound, WikiScraper
+from utils.metrics import metrics
+from utils.processes import process_context
+
+from .aliases import AliasMap
+from .frontier import BreadthFirstFrontier, Frontier
+from .journal import DONE, DUPLICATE, ERROR, CrawlJournal
+from .rate_limit import HostRateLimiter
+from .work_queue import CompletedPage, WorkQueue
+
+T = TypeVar("T")
+
+Extractor = Callable[[str], T]
+Aggregator = Callable[[str, T], Iterable[str]]
+
+
+def rps_from_wait(wait: float) -> float | None:
+    return 1 / wait if wait > 0 else None
+
+
+class ConcurrentCrawler:
+    # Three stages connected by bounded in-flight sets: fetch (I/O threads), extract (inline or
+    # a process pool) and aggregate (the calling thread, the only writer). A full extract backlog
+    # stops new fetches, so memory stays flat however far the fetchers get ahead.
+    def __init__(
+        self,
+        scraper: WikiScraper,
+        *,
+        workers: int = 1,
+        rps: float | None = None,
+        limiter: HostRateLimiter | None = None,
+        parse_workers: int = 0,
+        queue_size: int | None = None,
+    ):
+        self.scraper = scraper
+        self.workers = max(1, workers)
+        self.limiter = limiter if limiter is not None else HostRateLimiter(rps)
+        self.host = urlparse(scraper.config.wiki_url or "").netloc
+        self.parse_workers = max(0, parse_workers)
+        self.queue_size = queue_size or 2 * max(self.workers, self.parse_workers)
+
+    def _fetch(self, pages: list[str]) -> dict[str, str]:
+        self.limiter.acquire(self.host)
+        # Always fetch_pages(), so a page is rendered the same whether or not it shares a batch.
+        return self.scraper.fetch_pages(pages)
+
+    def crawl(
+        self,
+        start_subpage: str,
+        depth: int,
+        extract: Extractor,
+        aggregate: Aggregator,
+        *,
+        limit: int = 0,
+        journal: CrawlJournal | None = None,
+        resume: bool = False,
+        checkpoint_every: int = 50,
+        on_checkpoint: Callable[[], None] | None = None,
+        frontier: Frontier | None = None,
+        aliases: AliasMap | None = None,
+    ) -> int:
+        journal = journal if journal is not None else CrawlJournal()
+        frontier = frontier if frontier is not None else BreadthFirstFrontier()
+        if aliases is not None:
+            start_subpage = aliases.resolve(start_subpage)
+        if journal.start(start_subpage, resume=resume):
+            print(f"Resuming crawl from {start_subpage}")
+        for title in journal.seen_titles():
+            frontier.mark_seen(title)
+        for title, level, inlinks in journal.pending_pages():
+            frontier.add(title, level, inlinks)
+        visited = journal.visited_count()
+        since_checkpoint = 0
+        shown_level = -1
+
+        def checkpoint() -> None:
+            # Aggregated results must be durable before the journal claims the pages are done.
+            if on_checkpoint is not None:
+                on_checkpoint()
+            if aliases is not None:
+                aliases.flush()
+            journal.checkpoint()
+            metrics.emit()
+
+        def deduplicate(page: str, extracted) -> str | None:
+            # The title to count the page under, or None if this run already counted it.
+            canonical = getattr(extracted, "canonical", None)
+            if canonical and canonical != page:
+                aliases.add_alias(page, canonical)
+                frontier.mark_seen(canonical)
+                page = canonical
+            fingerprint = getattr(extracted, "fingerprint", None)
+            original = aliases.duplicate_of(journal.run_id, page, fingerprint)
+            if original is not None:
+                print(f"Skipping {page}: duplicate of {original}")
+                return None
+            aliases.add_fingerprint(journal.run_id, page, fingerprint)
+            return page
+
+        def record(page: str, result: Future, level: int) -> None:
+            nonlocal visited, since_checkpoint
+            try:
+                extracted = result.result()
+                title = deduplicate(page, extracted) if aliases is not None else page
+                if title is None:
+                    journal.mark(page, DUPLICATE)
+                    metrics.inc("pages_duplicate")
+                    links = []
+                else:
+                    links = aggregate(title, extracted)
+                    if aliases is not None:
+                        links = [aliases.resolve(link) for link in links]
+                    journal.mark(page, DONE)
+                    visited += 1
+                    metrics.inc("pages_crawled")
+                if level + 1 < depth:
+                    # Pages already crawled are filtered out in memory before touching the journal.
+                    queued = [link for link in links if frontier.add(link, level + 1)]
+                    journal.enqueue(queued, level + 1)
+            except Exception as e:
+                journal.mark(page, ERROR)
+                metrics.inc("page_errors")
+                print(f"Error processing {page}: {e}")
+
+            since_checkpoint += 1
+            if since_checkpoint >= checkpoint_every:
+                checkpoint()
+                since_checkpoint = 0
+
+        def next_pages(count: int, in_flight: int) -> list[tuple[str, int]]:
+            nonlocal shown_level
+            if limit > 0:
+                count = min(count, limit - visited - in_flight)
+            pages = []
+            while len(pages) < count and (page := frontier.pop()) is not None:
+                if aliases is not None and aliases.counted(journal.run_id, page[0]):
+                    # Queued before an alias of it was crawled and counted under this title.
+                    journal.mark(page[0], DUPLICATE)
+                    metrics.inc("pages_duplicate")
+                    continue
+                if page[1] > shown_level:
+                    shown_level = page[1]
+                    print(f"Visited {visited} pages")
+                    print(f"iteration {shown_level + 1}:")
+                pages.append(page)
+            return pages
+
+        try:
+            self._pipeline(extract, next_pages, record)
+        finally:
+            checkpoint()
+            frontier.close()
+
+        return visited
+
+    def visit(
+        self, titles: Iterable[str], extract: Extractor, record: Callable[[str, Future], None]
+    ) -> None:
+        # Fetches and extracts a fixed set of pages, without following their links.
+        remaining = iter(titles)
+
+        def next_pages(count: int, _in_flight: int) -> list[tuple[str, int]]:
+            return [(title, 0) for title in islice(remaining, count)]
+
+        self._pipeline(extract, next_pages, lambda page, result, level: record(page, result))
+
+    def work(
+        self,
+        queue: WorkQueue,
+        node: str,
+        extract: Callable[[str], PageExtract],
+        *,
+        shard: tuple[int, int] | None = None,
+        checkpoint_every: int = 50,
+        poll_interval: float = 1.0,
+    ) -> int:
+        # One node of a distributed crawl: pages are claimed from the shared queue and handed back
+        # together with their counts and links, so the queue alone decides what is crawled next.
+        completed: list[CompletedPage] = []
+        crawled = 0
+
+        def checkpoint() -> None:
+            nonlocal crawled
+            if completed:
+                crawled += queue.complete(node, completed)
+                completed.clear()
+            metrics.emit()
+
+        def next_pages(count: int, in_flight: int) -> list[tuple[str, int]]:
+            while True:
+                pages = queue.claim(node, count, shard=shard)
+                if pages or in_flight:
+                    return pages
+                # Idle: hand back what is done, since other nodes may be waiting on its links.
+                checkpoint()
+                if queue.finished():
+                    return []
+                time.sleep(poll_interval)
+
+        def record(page: str, result: Future, level: int) -> None:
+            try:
+                extracted = result.result()
+                completed.append(CompletedPage(
+                    page, level, DONE, extracted.counts, extracted.links, extracted.revision
+                ))
+                metrics.inc("pages_crawled")
+            except Exception as e:
+                completed.append(CompletedPage(page, level, ERROR))
+                metrics.inc("page_errors")
+                print(f"Error processing {page}: {e}")
+            if len(completed) >= checkpoint_every:
+                checkpoint()
+
+        try:
+            self._pipeline(extract, next_pages, record)
+        finally:
+            checkpoint()
+
+        return crawled
+
+    def _pipeline(
+        self,
+        extract: Extractor,
+        next_pages: Callable[[int, int], list[tuple[str, int]]],
+        record: Callable[[str, Future, int], None],
+    ) -> None:
+        # Each fetch job covers up to `batch_size` pages (one round trip for batching backends).
+        # next_pages is given the batch size and the number of pages still in flight.
+        batch_size = max(1, getattr(self.scraper, "batch_size", 1))
+        fetching: dict[Future, list[tuple[str, int]]] = {}
+        parsing: dict[Future, tuple[str, int]] = {}
+        fetching_pages = 0
+
+        parse_pool = (
+            ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=process_context())
+            if self.parse_workers else None
+        )
+        fetch_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawl-fetch")
+        try:
+            while True:
+                while len(fetching) < self.workers and len(parsing) < self.queue_size:
+                    pages = next_pages(batch_size, fetching_pages + len(parsing))
+                    if not pages:
+                        break
+                    for page, _ in pages:
+                        print(f"Fetching {page}")
+                    fetching[fetch_pool.submit(self._fetch, [page for page, _ in pages])] = pages
+                    fetching_pages += len(pages)
+
+                if not fetching and not parsing:
+                    break
+
+                done, _ = wait([*fetching, *parsing], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in parsing:
+                        page, level = parsing.pop(future)
+                        record(page, future, level)
+                        continue
+
+                    pages = fetching.pop(future)
+                    fetching_pages -= len(pages)
+                    levels = dict(pages)
+                    for page, fetched in _page_outcomes(future, list(levels)):
+                        if fetched.exception() is None and parse_pool is not None:
+                            parsed = parse_pool.submit(extract, fetched.result())
+                            parsing[parsed] = (page, levels[page])
+                        else:
+                            record(page, _run(extract, fetched), levels[page])
+        finally:
+            fetch_pool.shutdown(cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+
+
+def _page_outcomes(fetched: Future, pages: list[str]) -> list[tuple[str, Future]]:
+    # Splits the result of one fetch job into a completed future per page.
+    outcomes = []
+    for page in pages:
+        outcome: Future = Future()
+        if fetched.exception() is not None:
+            outcome.set_exception(fetched.exception())
+        elif page in fetched.result():
+            outcome.set_result(fetched.result()[page])
+        else:
+            outcome.set_exception(PageNotFound(f"Page not found: '{page}'"))
+        outcomes.append((page, outcome))
+    return outcomes
+
+
+def _run(extract: Extractor, fetched: Future) -> Future:
+    # Runs the extract stage inline, packaging the outcome like a pool future would.
+    result: Future = Future()
+    try:
+        result.set_result(extract(fetched.result()))
+    except Exception as e:
+        result.set_exception(e)
+    return result
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import os
+import sqlite3
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+
+FRONTIER_STRATEGIES = ("bfs", "inlinks")
+
+# Rough in-memory cost of one queued page and one seen digest, used to turn a memory
+# ceiling into entry counts.
+QUEUED_ENTRY_BYTES = 400
+SEEN_ENTRY_BYTES = 80
+
+
+def title_digest(title: str) -> int:
+    # Signed, so that digests fit SQLite integers when spilled to disk.
+    digest = hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _spill_connection(spill_dir: Path | None, prefix: str) -> tuple[sqlite3.Connection, Path]:
+    # Scratch databases: nothing in them has to survive a crash (the journal does), so skip
+    # durability.
+    if spill_dir is not None:
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".sqlite", dir=spill_dir)
+    os.close(fd)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    return conn, Path(path)
+
+
+class SeenSet:
+    # Exact membership over 64-bit title digests instead of the title strings themselves.
+    def __init__(self):
+        self._digests: set[int] = set()
+
+    def __contains__(self, title: str) -> bool:
+        return self.has_digest(title_digest(title))
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def add(self, title: str) -> bool:
+        return self.add_digest(title_digest(title))
+
+    def has_digest(self, digest: int) -> bool:
+        return digest in self._digests
+
+    def add_digest(self, digest: int) -> bool:
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+
+class BloomFilter:
+    # Fixed-size membership with a bounded false-positive rate: a false positive makes the
+    # crawl skip a page it never saw, in exchange for memory that does not grow with the wiki.
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / max(1, capacity) * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, digest: int) -> list[int]:
+        # Double hashing over two halves derived from one 64-bit digest.
+        h1 = digest & 0xFFFFFFFFFFFFFFFF
+        h2 = ((h1 * 0x9E3779B97F4A7C15) >> 17 | 1) & 0xFFFFFFFFFFFFFFFF
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, title: str) -> bool:
+        return self.has_digest(title_digest(title))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, title: str) -> bool:
+        return self.add_digest(title_digest(title))
+
+    def has_digest(self, digest: int) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add_digest(self, digest: int) -> bool:
+        new = False
+        for p in self._positions(digest):
+            if not self._bits[p >> 3] & (1 << (p & 7)):
+                self._bits[p >> 3] |= 1 << (p & 7)
+                new = True
+        self._count += new
+        return new
+
+
+class DiskSeenSet(SeenSet):
+    # Keeps at most max_entries digests in memory; beyond that they are moved to an SQLite table.
+    # A Bloom filter over the spilled digests spares new titles the disk lookup.
+    def __init__(self, max_entries: int, spill_dir: Path | None = None):
+        super().__init__()
+        self.max_entries = max(1, max_entries)
+        self.spill_dir = spill_dir
+        self._spilled_filter = BloomFilter(8 * self.max_entries, error_rate=0.01)
+        self._conn: sqlite3.Connection | None = None
+        self._path: Path | None = None
+        self._spilled = 0
+
+    def __len__(self) -> int:
+        return len(self._digests) + self._spilled
+
+    def add_digest(self, digest: int) -> bool:
+        if self.has_digest(digest):
+            return False
+        self._digests.add(digest)
+        if len(self._digests) >= self.max_entries:
+            self._spill()
+        return True
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._path.unlink(missing_ok=True)
+            self._conn = None
+
+    def has_digest(self, digest: int) -> bool:
+        if digest in self._digests:
+            return True
+        if not self._spilled or not self._spilled_filter.has_digest(digest):
+            return False
+        row = self._conn.execute("SELECT 1 FROM seen WHERE digest = ?", (digest,)).fetchone()
+        return row is not None
+
+    def _spill(self) -> None:
+        if self._conn is None:
+            self._conn, self._path = _spill_connection(self.spill_dir, "seen-")
+            self._conn.execute("CREATE TABLE seen (digest INTEGER PRIMARY KEY)")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO seen (digest) VALUES (?)", ((d,) for d in self._digests)
+        )
+        self._conn.commit()
+        for digest in self._digests:
+            self._spilled_filter.add_digest(digest)
+        self._spilled += len(self._digests)
+        self._digests.clear()
+
+
+@dataclass
+class _Queued:
+    title: str
+    depth: int
+    inlinks: int
+    priority: tuple
+
+
+class Frontier:
+    # Pages waiting to be fetched, popped in priority order from a heap. A page whose priority
+    # changes is pushed again and its outdated entries are skipped when they surface.
+    # With max_queued set, the lower-priority half of an overfull heap moves to an SQLite table
+    # and comes back once the pages in memory rank below the best of it.
+    order_by = "depth"
+
+    def __init__(
+        self,
+        *,
+        seen: SeenSet | BloomFilter | None = None,
+        max_per_namespace: int = 0,
+        max_queued: int = 0,
+        spill_dir: Path | None = None,
+    ):
+        self.seen = seen if seen is not None else SeenSet()
+        self.max_per_namespace = max_per_namespace
+        self.max_queued = max_queued
+        self.spill_dir = spill_dir
+        self._heap: list[tuple[tuple, int, int]] = []
+        self._queued: dict[int, _Queued] = {}
+        self._namespaces: Counter = Counter()
+        self._order = count()
+        self._spill: sqlite3.Connection | None = None
+        self._spill_path: Path | None = None
+        self._spilled = 0
+        self._spill_best: tuple | None = None
+
+    def __len__(self) -> int:
+        return len(self._queued) + self._spilled
+
+    def priority(self, depth: int, _inlinks: int) -> tuple:
+        return (depth,)
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill_path.unlink(missing_ok=True)
+            self._spill = None
+        if isinstance(self.seen, DiskSeenSet):
+            self.seen.close()
+
+    def add(self, title: str, depth: int, inlinks: int = 1) -> bool:
+        # True if the page is (now) waiting in the frontier; False if it was crawled already
+        # or its namespace is full.
+        digest = title_digest(title)
+        queued = self._queued.get(digest)
+        if queued is not None:
+            queued.depth = min(queued.depth, depth)
+            queued.inlinks += inlinks
+            priority = self.priority(queued.depth, queued.inlinks)
+            if priority != queued.priority:
+                queued.priority = priority
+                self._push(digest, priority)
+            return True
+        # Only a page seen before can be waiting on disk.
+        if (
+            self._spilled
+            and self.seen.has_digest(digest)
+            and self._update_spilled(digest, depth, inlinks)
+        ):
+            return True
+
+        if not self._admit(title, digest):
+            return False
+        priority = self.priority(depth, inlinks)
+        self._queued[digest] = _Queued(title, depth, inlinks, priority)
+        self._push(digest, priority)
+        if self.max_queued and len(self._queued) > self.max_queued:
+            self._spill_out()
+        return True
+
+    def mark_seen(self, title: str) -> None:
+        # For pages crawled before a resume: never queued again, but counted towards namespace caps.
+        self._admit(title, title_digest(title))
+
+    def pop(self) -> tuple[str, int] | None:
+        top = self._peek()
+        # Pages on disk only come back when they rank strictly better: on ties (e.g. a whole BFS
+        # level) the ones in memory go first. One refill brings back the best of the spill table
+        # in order, so the next page is always in memory after it.
+        if self._spilled and (top is None or self._spill_best < top):
+            self._refill()
+            if self.max_queued and len(self._queued) > self.max_queued:
+                self._spill_out()
+            top = self._peek()
+        if top is None:
+            return None
+        _, _, digest = heapq.heappop(self._heap)
+        queued = self._queued.pop(digest)
+        return queued.title, queued.depth
+
+    def _peek(self) -> tuple | None:
+        while self._heap:
+            priority, _, digest = self._heap[0]
+            queued = self._queued.get(digest)
+            if queued is not None and queued.priority == priority:
+                return priority
+            heapq.heappop(self._heap)
+        return None
+
+    def _spill_out(self) -> None:
+        if self._spill is None:
+            self._spill, self._spill_path = _spill_connection(self.spill_dir, "frontier-")
+            self._spill.execute(
+                "CREATE TABLE queued ("
+                "digest INTEGER PRIMARY KEY, title TEXT NOT NULL, depth INTEGER NOT NULL, "
+                "inlinks INTEGER NOT NULL)"
+            )
+            self._spill.execute(f"CREATE INDEX queued_by_priority ON queued ({self.order_by})")
+
+        ranked = sorted(self._queued.items(), key=lambda item: item[1].priority)
+        moved = ranked[max(1, self.max_queued // 2):]
+        self._spill.executemany(
+            "INSERT INTO queued (digest, title, depth, inlinks) VALUES (?, ?, ?, ?)",
+            ((digest, queued.title, queued.depth, queued.inlinks) for digest, queued in moved),
+        )
+        for digest, _ in moved:
+            del self._queued[digest]
+        self._spilled += len(moved)
+        best = moved[0][1].priority
+        self._spill_best = best if self._spill_best is None else min(self._spill_best, best)
+        self._rebuild_heap()
+
+    def _update_spilled(self, digest: int, depth: int, inlinks: int) -> bool:
+        row = self._spill.execute(
+            "UPDATE queued SET depth = MIN(depth, ?), inlinks = inlinks + ? "
+            "WHERE digest = ? RETURNING depth, inlinks",
+            (depth, inlinks, digest),
+        ).fetchone()
+        if row is None:
+            return False
+        self._spill_best = min(self._spill_best, self.priority(*row))
+        return True
+
+    def _refill(self) -> None:
+        rows = self._spill.execute(
+            f"SELECT digest, title, depth, inlinks FROM queued ORDER BY {self.order_by} LIMIT ?",
+            (max(1, self.max_queued // 2),),
+        ).fetchall()
+        self._spill.executemany("DELETE FROM queued WHERE digest = ?", ((row[0],) for row in rows))
+        self._spilled -= len(rows)
+        for digest, title, depth, inlinks in rows:
+            priority = self.priority(depth, inlinks)
+            self._queued[digest] = _Queued(title, depth, inlinks, priority)
+            self._push(digest, priority)
+        best = self._spill.execute(
+            f"SELECT depth, inlinks FROM queued ORDER BY {self.order_by} LIMIT 1"
+        ).fetchone()
+        self._spill_best = self.priority(*best) if best else None
+
+    def _admit(self, title: str, digest: int) -> bool:
+        if self.max_per_namespace:
+            namespace = title.split(":", 1)[0].lower() if ":" in title else ""
+            if self._namespaces[namespace] >= self.max_per_namespace:
+                return False
+            if not self.seen.add_digest(digest):
+                return False
+            self._namespaces[namespace] += 1
+            return True
+        return self.seen.add_digest(digest)
+
+    def _push(self, digest: int, priority: tuple) -> None:
+        heapq.heappush(self._heap, (priority, next(self._order), digest))
+        # Outdated entries are dropped once they outnumber the live ones.
+        if len(self._heap) > 2 * len(self._queued) + 64:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [
+            (queued.priority, next(self._order), digest) for digest, queued in self._queued.items()
+        ]
+        heapq.heapify(self._heap)
+
+
+class BreadthFirstFrontier(Frontier):
+    pass
+
+
+class InLinkFrontier(Frontier):
+    # Best-first: the pages linked from the most crawled pages go first, shallower ones on ties.
+    order_by = "inlinks DESC, depth"
+
+    def priority(self, depth: int, inlinks: int) -> tuple:
+        return (-inlinks, depth)
+
+
+def make_frontier(
+    strategy: str = "bfs", *, max_memory_mb: int = 0, spill_dir: Path | None = None, **kwargs
+) -> Frontier:
+    if max_memory_mb > 0:
+        # Half of the budget for queued pages, a quarter for the seen digests; the rest spills.
+        budget = max_memory_mb * 2**20
+        kwargs.setdefault("seen", DiskSeenSet(budget // 4 // SEEN_ENTRY_BYTES, spill_dir))
+        kwargs.setdefault("max_queued", budget // 2 // QUEUED_ENTRY_BYTES)
+        kwargs.setdefault("spill_dir", spill_dir)
+    if strategy == "bfs":
+        return BreadthFirstFrontier(**kwargs)
+    if strategy == "inlinks":
+        return InLinkFrontier(**kwargs)
+    choices = ", ".join(FRONTIER_STRATEGIES)
+    raise ValueError(f"Invalid crawl strategy: {strategy}. Use one of: {choices}")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import sqlite3
+import uuid
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+PENDING, DONE, ERROR, DUPLICATE = "pending", "done", "error", "duplicate"
+
+
+class CrawlJournal:
+    # Persists the frontier, visited set and per-page status of a crawl. Writes are batched
+    # in one open transaction and only become durable on checkpoint().
+    def __init__(self, path: Path | str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "title TEXT PRIMARY KEY, depth INTEGER NOT NULL, status TEXT NOT NULL, "
+            "links INTEGER NOT NULL DEFAULT 1);"
+            "CREATE INDEX IF NOT EXISTS pages_by_status ON pages (status, depth);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "links" not in columns:
+            # Journals written before in-link counts were tracked.
+            self._conn.execute("ALTER TABLE pages ADD COLUMN links INTEGER NOT NULL DEFAULT 1")
+        self._conn.commit()
+
+    def start(self, start_subpage: str, *, resume: bool = False) -> bool:
+        if resume and self._meta("start") == start_subpage:
+            return True
+
+        self._conn.execute("DELETE FROM pages")
+        self._conn.execute("DELETE FROM meta")
+        self._set_meta("start", start_subpage)
+        self._set_meta("run_id", uuid.uuid4().hex)
+        self.enqueue([start_subpage], 0)
+        self.checkpoint()
+        return False
+
+    @property
+    def run_id(self) -> str:
+        return self._meta("run_id")
+
+    @property
+    def level(self) -> int | None:
+        row = self._conn.execute(
+            "SELECT MIN(depth) FROM pages WHERE status = ?", (PENDING,)
+        ).fetchone()
+        return row[0]
+
+    # Both stream from a cursor, so reloading a crawl of millions of pages does not list them all
+    # in memory; the journal must not be written to until they are consumed.
+    def pending_pages(self) -> Iterator[tuple[str, int, int]]:
+        return iter(self._conn.execute(
+            "SELECT title, depth, links FROM pages WHERE status = ?", (PENDING,)
+        ))
+
+    def seen_titles(self) -> Iterator[str]:
+        rows = self._conn.execute("SELECT title FROM pages WHERE status != ?", (PENDING,))
+        return (title for (title,) in rows)
+
+    def visited_count(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM pages WHERE status = ?", (DONE,)
+        ).fetchone()[0]
+
+    def enqueue(self, titles: Iterable[str], depth: int) -> None:
+        # Finding a page again counts one more in-link and may bring it closer to the start.
+        self._conn.executemany(
+            "INSERT INTO pages (title, depth, status) VALUES (?, ?, ?) "
+            "ON CONFLICT (title) DO UPDATE SET "
+            "depth = MIN(depth, excluded.depth), links = links + 1 WHERE status = excluded.status",
+            ((title, depth, PENDING) for title in titles),
+        )
+
+    def mark(self, title: str, status: str) -> None:
+        self._conn.execute("UPDATE pages SET status = ? WHERE title = ?", (status, title))
+
+    def checkpoint(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._conn.close()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
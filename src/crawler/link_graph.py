@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+GRAPH_FORMATS = ("csv", "parquet", "graphml")
+
+
+class LinkGraphStore:
+    # Records the outgoing links of every crawled page with titles interned to integer IDs.
+    # Edges are kept in SQLite so a resumed crawl adds to the same graph; compact() writes
+    # the CSR arrays that LinkGraph memory-maps.
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.directory / "edges.sqlite", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, title TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS edges ("
+            "src INTEGER NOT NULL, dst INTEGER NOT NULL, PRIMARY KEY (src, dst)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+        self._ids: dict[str, int] = dict(self._conn.execute("SELECT title, id FROM nodes"))
+
+    def __enter__(self) -> LinkGraphStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def intern(self, title: str) -> int:
+        with self._lock:
+            node = self._ids.get(title)
+            if node is None:
+                node = len(self._ids)
+                self._conn.execute("INSERT INTO nodes (id, title) VALUES (?, ?)", (node, title))
+                self._ids[title] = node
+            return node
+
+    def add_links(self, title: str, links: Iterable[str]) -> None:
+        with self._lock:
+            src = self.intern(title)
+            # A page fetched again replaces its outgoing links instead of adding to them.
+            self._conn.execute("DELETE FROM edges WHERE src = ?", (src,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO edges (src, dst) VALUES (?, ?)",
+                ((src, self.intern(link)) for link in links),
+            )
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def compact(self) -> LinkGraph:
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute("SELECT title FROM nodes ORDER BY id")
+            titles = [title for (title,) in rows]
+            count = self._conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+            edge_rows = self._conn.execute("SELECT src, dst FROM edges ORDER BY src, dst")
+            edges = np.fromiter(
+                (node for edge in edge_rows for node in edge),
+                dtype=np.int64,
+                count=2 * count,
+            ).reshape(-1, 2)
+
+        indptr = np.zeros(len(titles) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges[:, 0], minlength=len(titles)), out=indptr[1:])
+        _write_atomic(self.directory / "indptr.npy", lambda f: np.save(f, indptr))
+        indices = edges[:, 1].astype(np.int32)
+        _write_atomic(self.directory / "indices.npy", lambda f: np.save(f, indices))
+        # Titles last: LinkGraph.load() treats nodes.txt as the marker of a complete graph.
+        encoded = "\n".join(titles).encode("utf-8")
+        _write_atomic(self.directory / "nodes.txt", lambda f: f.write(encoded))
+        return LinkGraph.load(self.directory)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+class LinkGraph:
+    # Read-only link graph in compressed sparse row form: the links of node i are
+    # indices[indptr[i]:indptr[i + 1]].
+    def __init__(self, titles: list[str], indptr: np.ndarray, indices: np.ndarray):
+        self.titles = titles
+        self.indptr = indptr
+        self.indices = indices
+        self._ids = {title: node for node, title in enumerate(titles)}
+        self._in_degrees: np.ndarray | None = None
+
+    @classmethod
+    def load(cls, directory: Path) -> LinkGraph:
+        directory = Path(directory)
+        nodes_path = directory / "nodes.txt"
+        if not nodes_path.exists():
+            raise FileNotFoundError(f"No link graph found in {directory}")
+        text = nodes_path.read_text(encoding="utf-8")
+        titles = text.split("\n") if text else []
+        return cls(
+            titles,
+            np.load(directory / "indptr.npy", mmap_mode="r"),
+            np.load(directory / "indices.npy", mmap_mode="r"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._ids
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def node(self, title: str) -> int:
+        try:
+            return self._ids[title]
+        except KeyError:
+            raise KeyError(f"Page not in link graph: '{title}'") from None
+
+    def successors(self, title: str) -> list[str]:
+        node = self.node(title)
+        return [self.titles[dst] for dst in self.indices[self.indptr[node]:self.indptr[node + 1]]]
+
+    def out_degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degrees(self) -> np.ndarray:
+        if self._in_degrees is None:
+            self._in_degrees = np.bincount(self.indices, minlength=len(self.titles))
+        return self._in_degrees
+
+    def out_degree(self, title: str) -> int:
+        return int(self.out_degrees()[self.node(title)])
+
+    def in_degree(self, title: str) -> int:
+        return int(self.in_degrees()[self.node(title)])
+
+    def degrees(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(
+            {"title": self.titles, "in": self.in_degrees(), "out": self.out_degrees()}
+        )
+
+    def shortest_path(self, source: str, target: str) -> list[str] | None:
+        # Breadth-first search that expands a whole level of the frontier per step.
+        start, goal = self.node(source), self.node(target)
+        parents = np.full(len(self.titles), -1, dtype=np.int64)
+        parents[start] = start
+        frontier = np.array([start], dtype=np.int64)
+        while frontier.size and parents[goal] < 0:
+            starts, counts = self.indptr[frontier], np.diff(self.indptr)[frontier]
+            total = int(counts.sum())
+            if not total:
+                break
+            # Position of every out-edge of the frontier within self.indices.
+            offsets = (
+                np.arange(total)
+                - np.repeat(np.cumsum(counts) - counts, counts)
+                + np.repeat(starts, counts)
+            )
+            srcs = np.repeat(frontier, counts)
+            dsts = np.asarray(self.indices[offsets], dtype=np.int64)
+            unseen = parents[dsts] < 0
+            dsts, first = np.unique(dsts[unseen], return_index=True)
+            parents[dsts] = srcs[unseen][first]
+            frontier = dsts
+
+        if parents[goal] < 0:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(parents[path[-1]]))
+        return [self.titles[node] for node in reversed(path)]
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        srcs = np.repeat(np.arange(len(self.titles)), self.out_degrees())
+        for src, dst in zip(srcs, self.indices):
+            yield self.titles[src], self.titles[dst]
+
+    def to_frame(self) -> pd.DataFrame:
+        import pandas as pd
+
+        titles = np.array(self.titles, dtype=object)
+        srcs = np.repeat(np.arange(len(self.titles)), self.out_degrees())
+        return pd.DataFrame({"source": titles[srcs], "target": titles[np.asarray(self.indices)]})
+
+    def export(self, path: Path, fmt: str | None = None) -> None:
+        path = Path(path)
+        fmt = fmt or path.suffix.lstrip(".").lower()
+        if fmt == "csv":
+            self.to_frame().to_csv(path, index=False)
+        elif fmt == "parquet":
+            self.to_frame().to_parquet(path, index=False)
+        elif fmt == "graphml":
+            lines = (line.encode("utf-8") for line in self._graphml_lines())
+            _write_atomic(path, lambda f: f.writelines(lines))
+        else:
+            raise ValueError(f"Invalid graph format: {fmt}. Use one of: {', '.join(GRAPH_FORMATS)}")
+
+    def _graphml_lines(self) -> Iterator[str]:
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        yield '<key id="title" for="node" attr.name="title" attr.type="string"/>\n'
+        yield '<graph edgedefault="directed">\n'
+        for node, title in enumerate(self.titles):
+            yield f'<node id="n{node}"><data key="title">{_escape(title)}</data></node>\n'
+        srcs = np.repeat(np.arange(len(self.titles)), self.out_degrees())
+        for src, dst in zip(srcs, self.indices):
+            yield f'<edge source="n{src}" target="n{dst}"/>\n'
+        yield "</graph>\n</graphml>\n"
+
+
+def _escape(text: str) -> str:
+    return quoteattr(text)[1:-1]
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
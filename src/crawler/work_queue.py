@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.metrics import metrics
+
+from .frontier import title_digest
+from .journal import DONE, PENDING
+
+WORK_QUEUE_BACKENDS = ("sqlite",)
+
+CLAIMED = "claimed"
+# Titles hash into this many buckets; a node sharded as k/n prefers the buckets b with b % n == k.
+SHARD_BUCKETS = 1024
+DEFAULT_LEASE = 300.0
+
+
+@dataclass
+class CompletedPage:
+    title: str
+    depth: int
+    status: str
+    counts: Mapping[str, int] = field(default_factory=dict)
+    links: list[str] = field(default_factory=list)
+    revision: int | None = None
+
+
+class WorkQueue(ABC):
+    # A crawl frontier shared by several nodes. Pages are leased to the node that claims them and
+    # offered to the others again once the lease runs out, so a node that dies loses no work.
+    @abstractmethod
+    def start(self, start_subpage: str, depth: int, *, reset: bool = False) -> bool:
+        pass
+
+    @abstractmethod
+    def claim(
+        self, node: str, count: int, *, shard: tuple[int, int] | None = None
+    ) -> list[tuple[str, int]]:
+        pass
+
+    @abstractmethod
+    def complete(self, node: str, pages: list[CompletedPage]) -> int:
+        pass
+
+    @abstractmethod
+    def finished(self) -> bool:
+        pass
+
+    @abstractmethod
+    def take_pages(self) -> list[tuple[str, dict[str, int], int | None]] | None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> WorkQueue:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SqliteWorkQueue(WorkQueue):
+    # Shared through one SQLite file, e.g. on a network share. Every change takes the database's
+    # file lock, so two nodes never lease the same page. No WAL: it does not work across machines.
+    def __init__(self, path: Path | str, *, lease: float = DEFAULT_LEASE, timeout: float = 30.0):
+        self.path = Path(path)
+        self.lease = lease
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "title TEXT PRIMARY KEY, depth INTEGER NOT NULL, status TEXT NOT NULL, "
+            "links INTEGER NOT NULL DEFAULT 1, shard INTEGER NOT NULL, owner TEXT, "
+            "lease_until REAL);"
+            "CREATE INDEX IF NOT EXISTS pages_by_status ON pages (status, depth);"
+            "CREATE INDEX IF NOT EXISTS pages_by_lease ON pages (status, lease_until);"
+            "CREATE TABLE IF NOT EXISTS page_counts ("
+            "title TEXT PRIMARY KEY, counts TEXT NOT NULL, revision INTEGER);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+
+    def start(self, start_subpage: str, depth: int, *, reset: bool = False) -> bool:
+        # Joins the crawl in progress from the same page to the same depth. Another crawl in
+        # progress is only replaced on reset, since its pages would be lost for every node working
+        # on it.
+        with self._transaction() as conn:
+            current = self._meta(conn, "start")
+            if current is not None and self._meta(conn, "merged") is None and not reset:
+                current_depth = int(self._meta(conn, "depth"))
+                if (current, current_depth) == (start_subpage, depth):
+                    return True
+                raise ValueError(
+                    f"The work queue holds another crawl, from {current} to depth {current_depth}; "
+                    "join it with the same arguments or reset the queue"
+                )
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM page_counts")
+            conn.execute("DELETE FROM meta")
+            self._set_meta(conn, "start", start_subpage)
+            self._set_meta(conn, "depth", str(depth))
+            self._enqueue(conn, [start_subpage], 0)
+        return False
+
+    def claim(
+        self, node: str, count: int, *, shard: tuple[int, int] | None = None
+    ) -> list[tuple[str, int]]:
+        if count <= 0:
+            return []
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "UPDATE pages SET status = ?, owner = NULL, lease_until = NULL "
+                "WHERE status = ? AND lease_until < ?",
+                (PENDING, CLAIMED, now),
+            ).rowcount
+            if expired:
+                metrics.inc("leases_expired", expired)
+            # Claiming again shows this node is alive, so its other leases are extended too.
+            conn.execute(
+                "UPDATE pages SET lease_until = ? WHERE status = ? AND owner = ?",
+                (now + self.lease, CLAIMED, node),
+            )
+            pages = self._claim(conn, node, count, now, shard)
+            if len(pages) < count and shard is not None:
+                # Out of its own shard, a node takes over pages from the others.
+                pages += self._claim(conn, node, count - len(pages), now, None)
+        return sorted(pages, key=lambda page: page[1])
+
+    def complete(self, node: str, pages: list[CompletedPage]) -> int:
+        # A page's counts and links are only taken while this node still holds its lease; past
+        # that the page went to another node, which reports it instead.
+        crawled = 0
+        counted = []
+        with self._transaction() as conn:
+            depth = int(self._meta(conn, "depth"))
+            for page in pages:
+                if not conn.execute(
+                    "UPDATE pages SET status = ?, owner = NULL, lease_until = NULL "
+                    "WHERE title = ? AND status = ? AND owner = ?",
+                    (page.status, page.title, CLAIMED, node),
+                ).rowcount:
+                    metrics.inc("leases_lost")
+                    continue
+                if page.status == DONE:
+                    crawled += 1
+                    counted.append((page.title, json.dumps(dict(page.counts)), page.revision))
+                if page.depth + 1 < depth:
+                    self._enqueue(conn, page.links, page.depth + 1)
+            conn.executemany(
+                "INSERT OR REPLACE INTO page_counts (title, counts, revision) VALUES (?, ?, ?)",
+                counted,
+            )
+        return crawled
+
+    def finished(self) -> bool:
+        return self._finished(self._conn)
+
+    def take_pages(self) -> list[tuple[str, dict[str, int], int | None]] | None:
+        # Every crawled page with its counts and revision once the crawl is finished, handed out
+        # exactly once, so the store can replace each page's old counts instead of adding to them.
+        with self._transaction() as conn:
+            if not self._finished(conn) or self._meta(conn, "merged") is not None:
+                return None
+            self._set_meta(conn, "merged", str(time.time()))
+            rows = conn.execute("SELECT title, counts, revision FROM page_counts ORDER BY title")
+            return [(title, json.loads(counts), revision) for title, counts, revision in rows]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, waiting out the other nodes.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _claim(
+        self,
+        conn: sqlite3.Connection,
+        node: str,
+        count: int,
+        now: float,
+        shard: tuple[int, int] | None,
+    ) -> list[tuple[str, int]]:
+        where, params = "status = ?", [PENDING]
+        if shard is not None:
+            where += " AND shard % ? = ?"
+            params += [shard[1], shard[0]]
+        return conn.execute(
+            "UPDATE pages SET status = ?, owner = ?, lease_until = ? WHERE title IN ("
+            f"SELECT title FROM pages WHERE {where} ORDER BY depth LIMIT ?) RETURNING title, depth",
+            (CLAIMED, node, now + self.lease, *params, count),
+        ).fetchall()
+
+    def _enqueue(self, conn: sqlite3.Connection, titles: Iterable[str], depth: int) -> None:
+        conn.executemany(
+            "INSERT INTO pages (title, depth, status, shard) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (title) DO UPDATE SET "
+            "depth = MIN(depth, excluded.depth), links = links + 1 WHERE status = excluded.status",
+            ((title, depth, PENDING, title_digest(title) % SHARD_BUCKETS) for title in titles),
+        )
+
+    @staticmethod
+    def _finished(conn: sqlite3.Connection) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM pages WHERE status IN (?, ?) LIMIT 1", (PENDING, CLAIMED)
+        ).fetchone() is None
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def make_work_queue(backend: str, location: Path | str, **kwargs) -> WorkQueue:
+    if backend == "sqlite":
+        return SqliteWorkQueue(location, **kwargs)
+    choices = ", ".join(WORK_QUEUE_BACKENDS)
+    raise ValueError(f"Invalid work queue backend: {backend}. Use one of: {choices}")
@@ -1,9 +1,36 @@
-from .base import WikiScraper
+from typing import TYPE_CHECKING
+
+from .base import PageNotFound, WikiScraper
+from .cache import PageCache
+from .compression import COMPRESSIONS, compress_snapshots
+from .mediawiki_api import MediaWikiApiScraper
+from .page import PageExtract, ParsedPage, page_revision
 from .stardew import StardewScraper
 from .stardew_file_wrapper import StardewFileScraper
 
+if TYPE_CHECKING:
+    from .bulk import ingest
+
 __all__ = [
+    "COMPRESSIONS",
+    "MediaWikiApiScraper",
+    "PageCache",
+    "PageExtract",
+    "PageNotFound",
+    "ParsedPage",
     "WikiScraper",
     "StardewScraper",
     "StardewFileScraper",
+    "compress_snapshots",
+    "ingest",
+    "page_revision",
 ]
+
+
+def __getattr__(name: str):
+    # The bulk ingestion machinery (archives, XML dumps, process pools) is loaded on first use.
+    if name == "ingest":
+        from .bulk import ingest
+
+        return ingest
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,40 +1,208 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import requests
 
+from utils.metrics import metrics
+
+from .cache import PageCache
+from .page import PageExtract, ParsedPage
+from .session import build_session
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .summary import SummaryScanner
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class PageNotFound(ValueError):
+    # The wiki reported that the page does not exist, as opposed to failing to answer.
+    pass
+
 
 class WikiScraper(ABC):
+    # How many pages fetch_pages() retrieves per round trip; crawls group their fetches by it.
+    batch_size = 1
+
     def __init__(self, config):
         self.config = config
-        self.session = requests.Session()
-        self.session.headers.update(config.headers)
+        self.session = build_session(config)
+        self.cache = PageCache.from_config(config)
 
+    @metrics.timed("fetch_page")
     def fetch_page(self, subpage: str) -> str:
         try:
-            url = self._fetch_url(subpage)
-            response = self.session.get(url, timeout=self.config.timeout)
-            response.raise_for_status()
-            return response.text
+            with metrics.timer("fetch_url"):
+                url = self._fetch_url(subpage)
+            html = self._get_text(url)
+            if html is None:
+                # The first response body is used as-is; only a missing page costs a second lookup.
+                with metrics.timer("fallback_fetch_url"):
+                    url = self._fallback_fetch_url(subpage)
+                html = self._get_text(url)
+            if html is None:
+                raise PageNotFound(f"Page not found: '{subpage}'")
+            return html
         except requests.exceptions.RequestException as e:
             raise ConnectionError(f"Request error for {subpage}: {e}") from e
 
+    def fetch_pages(self, subpages: Iterable[str]) -> dict[str, str]:
+        # Pages that do not exist are left out of the result.
+        pages = {}
+        for subpage in subpages:
+            try:
+                pages[subpage] = self.fetch_page(subpage)
+            except PageNotFound:
+                continue
+        return pages
+
+    def fetch_counted_page(self, subpage: str) -> str:
+        # A page as crawls and refreshes count it. Batching backends may render fetch_pages()
+        # differently from fetch_page(), so single pages go through fetch_pages() as well.
+        pages = self.fetch_pages([subpage])
+        if subpage not in pages:
+            raise PageNotFound(f"Page not found: '{subpage}'")
+        return pages[subpage]
+
+    def fetch_revisions(self, _subpages: Iterable[str]) -> dict[str, int]:
+        # Current revision ids, for backends that can look them up without fetching the pages;
+        # refreshes then skip unchanged pages. Here they only come with the pages themselves.
+        return {}
+
+    def fetch_summary(self, subpage: str) -> str:
+        return self.parse_summary(self.fetch_page(subpage))
+
+    def _stream_text(self, url: str, scanner: SummaryScanner) -> bool:
+        # Feeds the page at `url` to an incremental scanner as it downloads and closes the
+        # connection as soon as the scanner is done. False if the page does not exist.
+        entry = self.cache.get(url) if self.cache else None
+        if self.cache and (self.cache.offline or (entry and self.cache.is_fresh(entry))):
+            text = self._get_text(url)
+            if text is None:
+                return False
+            scanner.feed(text)
+            scanner.close()
+            return True
+
+        with self.session.get(url, stream=True, timeout=self.config.timeout) as response:
+            metrics.inc("http_requests")
+            if response.status_code == 404:
+                return False
+            response.raise_for_status()
+            # Like response.text, minus the guessing from the whole body when no charset is sent.
+            response.encoding = response.encoding or "utf-8"
+            try:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True):
+                    if scanner.feed(chunk):
+                        metrics.inc("streams_closed_early")
+                        return True
+                scanner.close()
+                return True
+            finally:
+                metrics.inc("bytes_downloaded", response.raw.tell())
+
+    def _get_text(self, url: str) -> str | None:
+        entry = self.cache.get(url) if self.cache else None
+        if entry and (self.cache.offline or self.cache.is_fresh(entry)):
+            metrics.inc("cache_hits")
+            return entry.text
+        if self.cache and self.cache.offline:
+            metrics.inc("cache_misses")
+            raise ConnectionError(f"Offline mode: '{url}' is not cached")
+
+        response = self._get(url, headers=entry.conditional_headers() if entry else None)
+        metrics.inc("http_requests")
+        metrics.inc("bytes_downloaded", _wire_bytes(response))
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            metrics.inc("http_retries", len(retries.history))
+
+        if response.status_code == 304 and entry:
+            metrics.inc("cache_revalidated")
+            self.cache.touch(url)
+            return entry.text
+        if self.cache:
+            metrics.inc("cache_misses")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        if self.cache:
+            self.cache.put(
+                url,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response.text
+
+    def parse_page(self, html_content: str) -> ParsedPage:
+        return ParsedPage(html_content)
+
+    def _get(self, url: str, headers: dict | None = None) -> requests.Response:
+        return self.session.get(url, headers=headers, timeout=self.config.timeout)
+
     @abstractmethod
     def _fetch_url(self, search_phrase: str) -> str:
         pass
 
+    def _fallback_fetch_url(self, search_phrase: str) -> str:
+        raise PageNotFound(f"Page not found: '{search_phrase}'")
+
     @abstractmethod
-    def parse_summary(self, html_content: str) -> str:
+    def parse_summary(self, html_content: str | ParsedPage) -> str:
         pass
 
     @abstractmethod
-    def extract_all_words(self, html_content: str) -> pd.DataFrame:
+    def extract_all_words(self, html_content: str | ParsedPage) -> pd.DataFrame:
         pass
 
+    def count_all_words(self, html_content: str | ParsedPage) -> Counter:
+        return Counter(self.extract_all_words(html_content)['word'])
+
     @abstractmethod
-    def extract_tables(self, html_content: str) -> list:
+    def extract_tables(self, html_content: str | ParsedPage) -> list:
         pass
 
+    def extract_table(self, html_content: str | ParsedPage, number: int) -> pd.DataFrame:
+        if number < 1:
+            raise ValueError("Table number must be at least 1.")
+        tables = self.extract_tables(html_content)
+        if number > len(tables):
+            raise ValueError("Table number exceeds number of tables.")
+        return tables[number - 1]
+
+    def iter_tables(self, html_content: str | ParsedPage) -> Iterator[pd.DataFrame]:
+        return iter(self.extract_tables(html_content))
+
     @abstractmethod
-    def fetch_page_redirections(self, html_content: str) -> list[str]:
+    def fetch_page_redirections(self, html_content: str | ParsedPage) -> list[str]:
         pass
+
+    def extractor(self) -> Callable[[str], PageExtract]:
+        # Crawls run this on every fetched page; a picklable (module-level) callable
+        # lets them do so in worker processes.
+        def extract(html_content: str) -> PageExtract:
+            page = self.parse_page(html_content)
+            return PageExtract(self.count_all_words(page), self.fetch_page_redirections(page))
+
+        return extract
+
+    def link_extractor(self) -> Callable[[str], PageExtract]:
+        # Like extractor(), for crawls that only follow links and count nothing.
+        def extract(html_content: str) -> PageExtract:
+            return PageExtract(Counter(), self.fetch_page_redirections(html_content))
+
+        return extract
+
+
+def _wire_bytes(response: requests.Response) -> int:
+    # Bytes as transferred, before urllib3 undoes any Content-Encoding.
+    tell = getattr(response.raw, "tell", None)
+    return tell() if tell is not None else len(response.content)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import os
+import tarfile
+import zipfile
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+from utils.processes import process_context
+
+from .compression import HTML_SUFFIXES, codec_of, html_title, read_dictionaries, read_html
+from .page import ParsedPage, page_revision
+from .tokenizer import count_words
+from .wikitext import wikitext_to_text
+
+# Work items are (kind, title, payload): local files are shipped to workers as paths so they are
+# read there, archive members as bytes, and dump revisions as wikitext.
+PATH, HTML_BYTES, WIKITEXT = "path", "html", "wikitext"
+WorkItem = tuple[str, str, "str | bytes"]
+
+_DUMP_SUFFIXES = (".xml", ".xml.bz2", ".xml.gz", ".xml.xz")
+_TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+_OPENERS = {".bz2": bz2.open, ".gz": gzip.open, ".xz": lzma.open}
+
+
+def title_from_filename(name: str) -> str:
+    return html_title(name).replace("_", " ").strip()
+
+
+def iter_work_items(source: Path) -> Iterator[WorkItem]:
+    source = Path(source)
+    name = source.name.lower()
+    if source.is_dir():
+        paths = (path for path in source.rglob("*.html*") if path.name.endswith(HTML_SUFFIXES))
+        for path in sorted(paths):
+            yield PATH, title_from_filename(path.name), str(path)
+    elif name.endswith(_DUMP_SUFFIXES):
+        for title, text in iter_dump_pages(source):
+            yield WIKITEXT, title, text
+    elif name.endswith(_TAR_SUFFIXES):
+        # "r|*" reads the archive as a stream, decompressing transparently without seeking.
+        with tarfile.open(source, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(".html"):
+                    data = archive.extractfile(member).read()
+                    yield HTML_BYTES, title_from_filename(member.name), data
+    elif name.endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(".html"):
+                    with archive.open(info) as f:
+                        yield HTML_BYTES, title_from_filename(info.filename), f.read()
+    elif name.endswith(HTML_SUFFIXES):
+        yield PATH, title_from_filename(name), str(source)
+    else:
+        raise ValueError(f"Unsupported bulk source: {source}")
+
+
+def iter_dump_pages(dump_path: Path) -> Iterator[tuple[str, str]]:
+    opener = _OPENERS.get(Path(dump_path).suffix, open)
+    with opener(dump_path, "rb") as f:
+        title, namespace, is_redirect, text = None, None, False, None
+        for _, elem in iterparse(f, events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                namespace = elem.text
+            elif tag == "redirect":
+                is_redirect = True
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if title and namespace == "0" and not is_redirect:
+                    yield title, text or ""
+                title, namespace, is_redirect, text = None, None, False, None
+                # Pages are dropped as soon as they are read, so memory stays flat on large dumps.
+                elem.clear()
+
+
+@lru_cache(maxsize=8)
+def _dictionaries(directory: str) -> dict[int, bytes]:
+    # Read once per worker process rather than once per page.
+    return read_dictionaries(Path(directory))
+
+
+def _read_text(path: str) -> str:
+    if codec := codec_of(path):
+        dictionaries = _dictionaries(os.path.dirname(path)) if codec == "zstd" else None
+        return read_html(path, dictionaries=dictionaries)
+    return Path(path).read_text(encoding="utf-8")
+
+
+def count_item(item: WorkItem) -> tuple[Counter, int | None]:
+    kind, _, payload = item
+    if kind == WIKITEXT:
+        return count_words([wikitext_to_text(payload)]), None
+    html = _read_text(payload) if kind == PATH else payload.decode("utf-8")
+    return count_words(ParsedPage(html).content_strings()), page_revision(html)
+
+
+def count_chunk(items: list[WorkItem]) -> list[tuple[str, Counter, int | None]]:
+    return [(item[1], *count_item(item)) for item in items]
+
+
+def _chunks(items: Iterable[WorkItem], size: int) -> Iterator[list[WorkItem]]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def ingest(source: Path, store, *, workers: int | None = None, chunksize: int = 16) -> int:
+    # Chunks are counted in worker processes and merged into the store by this process only, page
+    # by page, so ingesting a source again replaces its pages' counts rather than adding to them.
+    # At most a few chunks per worker are in flight, so huge archives are never read ahead.
+    workers = workers or os.cpu_count() or 1
+    pages = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+        in_flight: set[Future] = set()
+        for chunk in _chunks(iter_work_items(source), chunksize):
+            in_flight.add(pool.submit(count_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                pages += _merge(done, store)
+        pages += _merge(in_flight, store)
+    store.flush()
+    return pages
+
+
+def _merge(futures: Iterable[Future], store) -> int:
+    pages = 0
+    for future in futures:
+        for title, counts, revision in future.result():
+            store.set_page(title, counts, revision=revision)
+            pages += 1
+    return pages
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .compression import SUFFIXES, compress, decompress, resolve_codec
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    url: str
+    digest: str
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+    text: str
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    # Bodies are stored once per content digest under objects/, compressed with the codec
+    # named in the index; the SQLite index maps resolved URLs to digests plus validators,
+    # and drives TTL and LRU eviction by stored size.
+    def __init__(self, cache_dir: Path, *, ttl: float = 3600, max_bytes: int = 512 * 2**20,
+                 offline: bool = False, compression: str | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.codec = resolve_codec(compression)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_dir / "index.sqlite", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL, codec TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if "codec" not in columns:
+            # Caches written before objects were compressed.
+            self._conn.execute("ALTER TABLE entries ADD COLUMN codec TEXT")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config) -> PageCache | None:
+        if config.cache_dir is None:
+            return None
+        return cls(
+            config.cache_dir,
+            ttl=config.cache_ttl,
+            max_bytes=config.cache_max_mb * 2**20,
+            offline=config.offline,
+            compression=config.cache_compression,
+        )
+
+    def _object_path(self, digest: str, codec: str | None = None) -> Path:
+        return self.objects_dir / digest[:2] / (digest + SUFFIXES.get(codec, ""))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    def get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, etag, last_modified, stored_at, codec FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, stored_at, codec = row
+            try:
+                data = self._object_path(digest, codec).read_bytes()
+                text = decompress(data, codec).decode("utf-8")
+            except FileNotFoundError:
+                self._delete(url)
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url)
+                )
+        return CacheEntry(url, digest, etag, last_modified, stored_at, text)
+
+    def put(self, url: str, text: str, *, etag: str | None = None,
+            last_modified: str | None = None) -> CacheEntry:
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest, self.codec)
+        if path.exists():
+            size = path.stat().st_size
+        else:
+            body = compress(body, self.codec)
+            size = len(body)
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(url, digest, etag, last_modified, stored_at, accessed_at, size, codec) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, digest, etag, last_modified, now, now, size, self.codec),
+                )
+            self._evict()
+        return CacheEntry(url, digest, etag, last_modified, now, text)
+
+    def touch(self, url: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+            )
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        # Objects shared by several URLs are only counted once.
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, codec, size FROM entries)"
+        ).fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT url FROM entries ORDER BY accessed_at").fetchall()
+        for (url,) in rows:
+            if total <= self.max_bytes:
+                break
+            self._delete(url)
+            total = self._total_bytes()
+
+    def _delete(self, url: str) -> None:
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT digest, codec FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            if row is None:
+                return
+            still_used = self._conn.execute(
+                "SELECT 1 FROM entries WHERE digest = ? AND codec IS ? LIMIT 1", row
+            ).fetchone()
+        if not still_used:
+            self._object_path(*row).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import gzip
+import os
+import random
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+# brotli and zstandard are optional: without them pages are requested and stored with gzip only.
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIONS = ("auto", "zstd", "br", "gzip", "none")
+SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+HTML_SUFFIXES = (".html", *(f".html{suffix}" for suffix in SUFFIXES.values()))
+# Trained zstd dictionaries sit next to the snapshots they were trained on, as dictionary-<id>.zstd;
+# small pages that share the wiki's boilerplate compress several times better with one. Every zstd
+# frame records the id of its dictionary, so each file finds the one it was written with.
+DICTIONARY_PREFIX, DICTIONARY_SUFFIX = "dictionary-", ".zstd"
+DICTIONARY_SIZE = 112 * 1024
+MAX_DICTIONARY_SAMPLES = 2000
+
+
+def available_codecs() -> list[str]:
+    modules = (("zstd", zstandard), ("br", brotli), ("gzip", gzip))
+    return [codec for codec, module in modules if module]
+
+
+def accept_encoding() -> str:
+    # Every encoding urllib3 can decode here: gzip and deflate always, br and zstd when installed.
+    return ", ".join(encoding.strip() for encoding in ACCEPT_ENCODING.split(","))
+
+
+def resolve_codec(compression: str | None) -> str | None:
+    if compression in (None, "none"):
+        return None
+    if compression == "auto":
+        return available_codecs()[0]
+    if compression not in SUFFIXES:
+        choices = ", ".join(COMPRESSIONS)
+        raise ValueError(f"Invalid compression: {compression}. Use one of: {choices}")
+    if compression not in available_codecs():
+        package = "zstandard" if compression == "zstd" else "brotli"
+        raise ValueError(f"Compression '{compression}' needs the {package} package")
+    return compression
+
+
+def compress(data: bytes, codec: str | None, *, dictionary: bytes | None = None) -> bytes:
+    if codec is None:
+        return data
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "br":
+        return brotli.compress(data, quality=9)
+    if codec == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=10, dict_data=dict_data).compress(data)
+    raise ValueError(f"Invalid compression: {codec}")
+
+
+def decompress(
+    data: bytes, codec: str | None, *, dictionaries: Mapping[int, bytes] | None = None
+) -> bytes:
+    if codec is None:
+        return data
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "br":
+        return brotli.decompress(data)
+    if codec == "zstd":
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        dict_data = None
+        if dict_id:
+            if dict_id not in (dictionaries or {}):
+                raise ValueError(f"Missing zstd dictionary {dict_id}")
+            dict_data = zstandard.ZstdCompressionDict(dictionaries[dict_id])
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    raise ValueError(f"Invalid compression: {codec}")
+
+
+def train_dictionary(
+    samples: Iterable[bytes], size: int = DICTIONARY_SIZE, *, dict_id: int = 0
+) -> bytes | None:
+    # None when zstandard is missing or there are too few samples to learn from.
+    samples = list(samples)
+    if zstandard is None or len(samples) < 8:
+        return None
+    try:
+        return zstandard.train_dictionary(size, samples, dict_id=dict_id).as_bytes()
+    except zstandard.ZstdError:
+        return None
+
+
+def codec_of(path: Path | str) -> str | None:
+    suffix = Path(path).suffix
+    return next((codec for codec, known in SUFFIXES.items() if known == suffix), None)
+
+
+def html_title(path: Path | str) -> str:
+    name = Path(path).name
+    for suffix in reversed(HTML_SUFFIXES):
+        if name.endswith(suffix):
+            return name.removesuffix(suffix)
+    return name
+
+
+def dictionary_path(directory: Path, dict_id: int) -> Path:
+    return Path(directory) / f"{DICTIONARY_PREFIX}{dict_id}{DICTIONARY_SUFFIX}"
+
+
+def read_dictionaries(directory: Path) -> dict[int, bytes]:
+    dictionaries = {}
+    for path in Path(directory).glob(f"{DICTIONARY_PREFIX}*{DICTIONARY_SUFFIX}"):
+        dict_id = path.name.removeprefix(DICTIONARY_PREFIX).removesuffix(DICTIONARY_SUFFIX)
+        if dict_id.isdigit():
+            dictionaries[int(dict_id)] = path.read_bytes()
+    return dictionaries
+
+
+def read_html(path: Path | str, *, dictionaries: Mapping[int, bytes] | None = None) -> str:
+    # Snapshots may be stored plain or compressed; zstd ones use the directory's dictionaries.
+    path = Path(path)
+    codec = codec_of(path)
+    if codec == "zstd" and dictionaries is None:
+        dictionaries = read_dictionaries(path.parent)
+    return decompress(path.read_bytes(), codec, dictionaries=dictionaries).decode("utf-8")
+
+
+def write_html(path: Path, html: str, *, dictionary: bytes | None = None) -> int:
+    # The codec follows the file name; returns the bytes written.
+    data = compress(html.encode("utf-8"), codec_of(path), dictionary=dictionary)
+    return _write_atomic(path, data)
+
+
+def _write_atomic(path: Path, data: bytes) -> int:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def find_html(directory: Path, stem: str) -> Path | None:
+    for suffix in HTML_SUFFIXES:
+        path = Path(directory) / f"{stem}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def compress_snapshots(directory: Path, compression: str = "auto") -> tuple[int, int, int]:
+    # Rewrites every HTML snapshot in `directory` with one codec, training a zstd dictionary on
+    # a sample of them first. Returns (files, bytes before, bytes after).
+    directory = Path(directory)
+    codec = resolve_codec(compression)
+    paths = sorted(
+        path for path in directory.iterdir()
+        if path.is_file() and path.name.endswith(HTML_SUFFIXES)
+    )
+    old_dictionaries = read_dictionaries(directory)
+
+    # The new dictionary is saved before any file uses it and the old ones are only removed once
+    # no file does, so a run that stops partway leaves every file readable and can be rerun.
+    before = after = 0
+    dictionary, dict_id = None, None
+    if codec == "zstd":
+        dict_id = _new_dictionary_id(old_dictionaries)
+        sample = paths[::max(1, len(paths) // MAX_DICTIONARY_SAMPLES)]
+        samples = (
+            read_html(path, dictionaries=old_dictionaries).encode("utf-8") for path in sample
+        )
+        dictionary = train_dictionary(samples, dict_id=dict_id)
+        if dictionary is not None:
+            after += _write_atomic(dictionary_path(directory, dict_id), dictionary)
+
+    for path in paths:
+        before += path.stat().st_size
+        html = read_html(path, dictionaries=old_dictionaries)
+        target = path.with_name(html_title(path) + ".html" + (SUFFIXES[codec] if codec else ""))
+        after += write_html(target, html, dictionary=dictionary)
+        if target != path:
+            path.unlink()
+
+    for old_id, old_dictionary in old_dictionaries.items():
+        before += len(old_dictionary)
+        dictionary_path(directory, old_id).unlink()
+    return len(paths), before, after
+
+
+def _new_dictionary_id(taken: Iterable[int]) -> int:
+    # Ids below 32768 are reserved by zstd for registered dictionaries.
+    taken = set(taken)
+    while (dict_id := random.randrange(32768, 2**31)) in taken:
+        pass
+    return dict_id
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping
+
+# Below this many words a page's SimHash is too unstable to call it a near-duplicate of another.
+MIN_FINGERPRINT_WORDS = 50
+
+
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(counts: Mapping[str, int]) -> int | None:
+    # 64-bit SimHash over word counts: each bit is the sign of the count-weighted vote of the
+    # words' hashes, so similar vocabularies give fingerprints a few bits apart.
+    if sum(counts.values()) < MIN_FINGERPRINT_WORDS:
+        return None
+    import numpy as np
+
+    hashes = np.fromiter((_word_hash(word) for word in counts), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    bits = np.unpackbits(hashes.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1)
+    votes = weights @ (2.0 * bits - 1.0)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
@@ -0,0 +1,125 @@
+import re
+from urllib.parse import unquote, urlsplit
+
+from bs4 import BeautifulSoup, Tag
+from lxml import etree
+
+_SPACES_RE = re.compile(r"[\s_]+")
+
+BLOCKED_NAMESPACES = frozenset({
+    # some are unnecessary to block, but this is a good starting point
+    'file',
+    'image',
+    'category',
+    'special',
+    'help',
+    'talk',
+    'user',
+    'user talk',
+    'template',
+    'template talk',
+    'mediawiki',
+    'mediawiki talk',
+    'module',
+    'module talk',
+    'portal',
+    'draft',
+    'timedtext',
+    'mailto',
+    'tel',
+    'javascript',
+    'datei',
+})
+
+
+def normalize_title(title: str) -> str:
+    # MediaWiki's own normalization: underscores are spaces, runs of spaces collapse and the
+    # first letter is case-insensitive.
+    title = _SPACES_RE.sub(" ", title).strip()
+    return title[:1].upper() + title[1:]
+
+
+def href_to_title(href: str) -> str | None:
+    if href.lower().startswith(('/#', '/wiki/#', '//')):
+        return None
+
+    path = href.split('#')[0].split('?')[0].lstrip('/')
+    if not path:
+        return None
+
+    candidate = path.split('/', 1)[0]
+    title = normalize_title(unquote(candidate))
+    if not title:
+        return None
+
+    if ':' in title:
+        ns = title.split(':', 1)[0].lower()
+        if ns in BLOCKED_NAMESPACES:
+            return None
+
+    return title
+
+
+def content_links(content_div: Tag | None) -> list[str]:
+    if not content_div:
+        return []
+
+    raw_links = (a['href'] for a in content_div.select('a[href^="/"]'))
+    titles = (href_to_title(href) for href in raw_links)
+    return list(dict.fromkeys(t for t in titles if t is not None))
+
+
+class _ContentEnd(Exception):
+    pass
+
+
+class _LinkScanner:
+    # lxml parser target: sees the same start/end events BeautifulSoup's lxml builder does, but
+    # keeps only the hrefs inside the first #mw-content-text div and stops once that div closes.
+    def __init__(self):
+        self.hrefs: list[str] = []
+        self._depth = 0
+
+    def start(self, tag: str, attrib) -> None:
+        if self._depth:
+            self._depth += 1
+            if tag == 'a':
+                href = attrib.get('href')
+                if href is not None and href.startswith('/'):
+                    self.hrefs.append(href)
+        elif tag == 'div' and attrib.get('id') == 'mw-content-text':
+            self._depth = 1
+
+    def end(self, _tag: str) -> None:
+        if self._depth:
+            self._depth -= 1
+            if not self._depth:
+                raise _ContentEnd
+
+    def data(self, data: str) -> None:
+        pass
+
+    def close(self) -> list[str]:
+        return self.hrefs
+
+
+def scan_links(html_content: str | bytes) -> list[str]:
+    # Same titles as content_links() on the parsed page, from a single streaming pass without a
+    # tree.
+    scanner = _LinkScanner()
+    parser = etree.HTMLParser(target=scanner)
+    try:
+        parser.feed(html_content)
+        parser.close()
+    except _ContentEnd:
+        pass
+    titles = (href_to_title(href) for href in scanner.hrefs)
+    return list(dict.fromkeys(t for t in titles if t is not None))
+
+
+def canonical_title(soup: BeautifulSoup) -> str | None:
+    # The title a page is served under after redirects, from its <link rel="canonical">.
+    link = soup.find('link', rel='canonical', href=True)
+    if link is None:
+        return None
+    return href_to_title(urlsplit(link['href']).path or '/')
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import html
+import json
+from collections.abc import Iterable, Iterator
+from urllib.parse import quote, urlencode
+
+from utils.metrics import metrics
+
+from .base import PageNotFound
+from .stardew import StardewScraper
+from .wikitext import wikitext_to_text
+
+MAX_TITLES_PER_QUERY = 50
+# Error codes that mean the page does not exist; any other API error is the server failing to
+# answer.
+MISSING_PAGE_ERRORS = ("missingtitle", "invalidtitle")
+
+
+class MediaWikiApiScraper(StardewScraper):
+    # Talks to api.php instead of scraping rendered pages. Single pages come from action=parse
+    # (full HTML, for summaries and tables); crawls fetch up to 50 titles per round trip with
+    # prop=revisions|links, with redirects resolved by the server.
+    batch_size = MAX_TITLES_PER_QUERY
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.api_url = config.api_url
+
+    def _fetch_url(self, search_phrase: str) -> str:
+        return self._api_url(action="parse", page=search_phrase.strip(), prop="text", redirects=1)
+
+    def _api_url(self, **params) -> str:
+        params = {"format": "json", "formatversion": 2, **params}
+        return f"{self.api_url}?{urlencode(params)}"
+
+    def _api(self, **params) -> dict:
+        text = self._get_text(self._api_url(**params))
+        if text is None:
+            raise ConnectionError(f"MediaWiki API not found at {self.api_url}")
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ConnectionError(f"Invalid MediaWiki API response from {self.api_url}: {e}") from e
+        if "error" in data:
+            error = data["error"]
+            message = f"MediaWiki API error '{error.get('code')}': {error.get('info')}"
+            if error.get("code") in MISSING_PAGE_ERRORS:
+                raise PageNotFound(message)
+            raise RuntimeError(message)
+        return data
+
+    def _query(self, **params) -> Iterator[dict]:
+        # Follows the API's continuation protocol, yielding every partial response.
+        params = {"action": "query", **params}
+        cont: dict = {}
+        while True:
+            data = self._api(**params, **cont)
+            yield data
+            if "continue" not in data:
+                return
+            cont = data["continue"]
+
+    @metrics.timed("fetch_page")
+    def fetch_page(self, subpage: str) -> str:
+        try:
+            data = self._api(action="parse", page=subpage.strip(), prop="text", redirects=1)
+        except PageNotFound as e:
+            raise PageNotFound(f"Page not found: '{subpage}' ({e})") from e
+        parsed = data["parse"]
+        return _content_html(parsed["text"], parsed.get("title"), parsed.get("revid"))
+
+    @metrics.timed("fetch_summary")
+    def fetch_summary(self, subpage: str) -> str:
+        # The summary is in the lead section, which the API renders on its own.
+        try:
+            data = self._api(
+                action="parse", page=subpage.strip(), prop="text", section=0, redirects=1
+            )
+        except PageNotFound as e:
+            raise PageNotFound(f"Page not found: '{subpage}' ({e})") from e
+        try:
+            parsed = data["parse"]
+            return self.parse_summary(_content_html(parsed["text"], parsed.get("title")))
+        except ValueError:
+            return self.parse_summary(self.fetch_page(subpage))
+
+    def fetch_pages(self, subpages: Iterable[str]) -> dict[str, str]:
+        pages: dict[str, str] = {}
+        subpages = list(subpages)
+        for i in range(0, len(subpages), MAX_TITLES_PER_QUERY):
+            chunk = [title.strip() for title in subpages[i:i + MAX_TITLES_PER_QUERY]]
+            pages.update(self._fetch_chunk(chunk))
+        return pages
+
+    def fetch_revisions(self, subpages: Iterable[str]) -> dict[str, int]:
+        revisions: dict[str, int] = {}
+        subpages = list(subpages)
+        for i in range(0, len(subpages), MAX_TITLES_PER_QUERY):
+            chunk = [title.strip() for title in subpages[i:i + MAX_TITLES_PER_QUERY]]
+            aliases: dict[str, str] = {}
+            found: dict[str, int] = {}
+            for data in self._query(titles="|".join(chunk), prop="info", redirects=1):
+                query = data.get("query", {})
+                for mapping in (*query.get("normalized", ()), *query.get("redirects", ())):
+                    aliases[mapping["from"]] = mapping["to"]
+                for page in query.get("pages", ()):
+                    if "lastrevid" in page:
+                        found[page["title"]] = page["lastrevid"]
+            for title in chunk:
+                resolved = _resolve(aliases, title)
+                if resolved in found:
+                    revisions[title] = found[resolved]
+        return revisions
+
+    def _fetch_chunk(self, titles: list[str]) -> dict[str, str]:
+        aliases: dict[str, str] = {}
+        found: dict[str, dict] = {}
+        for data in self._query(
+            titles="|".join(titles),
+            prop="revisions|links",
+            rvprop="content|ids",
+            rvslots="main",
+            pllimit="max",
+            plnamespace=0,
+            redirects=1,
+        ):
+            query = data.get("query", {})
+            for mapping in (*query.get("normalized", ()), *query.get("redirects", ())):
+                aliases[mapping["from"]] = mapping["to"]
+            for page in query.get("pages", ()):
+                merged = found.setdefault(page["title"], {"links": [], "text": None, "revid": None})
+                merged["links"] += [link["title"] for link in page.get("links", ())]
+                if page.get("missing"):
+                    merged["missing"] = True
+                for revision in page.get("revisions", ()):
+                    merged["text"] = revision["slots"]["main"]["content"]
+                    merged["revid"] = revision.get("revid")
+
+        pages = {}
+        for title in titles:
+            resolved = _resolve(aliases, title)
+            page = found.get(resolved)
+            if page and not page.get("missing") and page["text"] is not None:
+                pages[title] = render_page(page["text"], page["links"], resolved, page["revid"])
+        return pages
+
+    def iter_all_pages(self, limit: int = 0) -> Iterator[tuple[str, str]]:
+        # generator=allpages enumerates the main namespace, content and links arriving
+        # with the titles in the same responses.
+        pending: dict[str, dict] = {}
+        yielded = 0
+        for data in self._query(
+            generator="allpages",
+            gapnamespace=0,
+            gaplimit=MAX_TITLES_PER_QUERY,
+            gapfilterredir="nonredirects",
+            prop="revisions|links",
+            rvprop="content|ids",
+            rvslots="main",
+            pllimit="max",
+            plnamespace=0,
+        ):
+            for page in data.get("query", {}).get("pages", ()):
+                merged = pending.setdefault(
+                    page["title"], {"links": [], "text": None, "revid": None}
+                )
+                merged["links"] += [link["title"] for link in page.get("links", ())]
+                for revision in page.get("revisions", ()):
+                    merged["text"] = revision["slots"]["main"]["content"]
+                    merged["revid"] = revision.get("revid")
+            # Pages stay pending until the batch's link continuation is exhausted.
+            if "batchcomplete" in data or "continue" not in data:
+                for title, page in pending.items():
+                    if page["text"] is not None:
+                        yield title, render_page(page["text"], page["links"], title, page["revid"])
+                        yielded += 1
+                        if 0 < limit <= yielded:
+                            return
+                pending.clear()
+
+
+def _resolve(aliases: dict[str, str], title: str) -> str:
+    while title in aliases and aliases[title] != title:
+        title = aliases[title]
+    return title
+
+
+def _content_html(body: str, title: str | None = None, revision: int | None = None) -> str:
+    # The resolved title goes into <link rel="canonical"> and the revision id into the JavaScript
+    # config, as on rendered wiki pages, so that crawls learn about redirects the API followed
+    # and refreshes about the revision they counted.
+    head = f'<link rel="canonical" href="/{_quote_title(title)}">' if title else ""
+    if revision is not None:
+        head += f'<script>RLCONF={{"wgRevisionId":{int(revision)}}};</script>'
+    head = f"<head>{head}</head>" if head else ""
+    return f'<html>{head}<body><div id="mw-content-text">{body}</div></body></html>'
+
+
+def _quote_title(title: str) -> str:
+    return quote(title.replace(" ", "_"))
+
+
+def render_page(
+    wikitext: str, links: Iterable[str], title: str | None = None, revision: int | None = None
+) -> str:
+    # Prose becomes one <p> per wikitext block; links from prop=links are added as empty anchors,
+    # so they are followed by crawls without adding words to the counts.
+    paragraphs = (block.strip() for block in wikitext_to_text(wikitext).split("\n\n"))
+    body = "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs if p)
+    anchors = "".join(f'<a href="/{_quote_title(link)}"></a>' for link in links)
+    return _content_html(f'<div class="mw-parser-output">{body}{anchors}</div>', title, revision)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+
+from utils.metrics import metrics
+
+# MediaWiki puts the id of the rendered revision in the page's JavaScript config.
+_REVISION_RE = re.compile(r'"wgRevisionId":\s*(\d+)')
+
+
+@dataclass
+class PageExtract:
+    counts: Counter
+    links: list[str]
+    canonical: str | None = None
+    fingerprint: int | None = None
+    revision: int | None = None
+
+
+def page_revision(html_content: str) -> int | None:
+    match = _REVISION_RE.search(html_content)
+    return int(match.group(1)) if match else None
+
+
+class ParsedPage:
+    def __init__(self, html_content: str, parser: str = "lxml"):
+        with metrics.timer("parse_page"):
+            self.soup = BeautifulSoup(html_content, parser)
+        self.content = self.soup.find('div', id='mw-content-text')
+
+    @classmethod
+    def of(cls, page: str | ParsedPage) -> ParsedPage:
+        return page if isinstance(page, ParsedPage) else cls(page)
+
+    def content_strings(self) -> Iterator[str]:
+        if not self.content:
+            return iter(())
+        # .strings skips <style>/<script> contents, so the shared tree is left untouched.
+        return self.content.strings
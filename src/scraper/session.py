@@ -0,0 +1,30 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .compression import accept_encoding
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_session(config) -> requests.Session:
+    retry = Retry(
+        total=config.max_retries,
+        backoff_factor=config.retry_backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_size,
+        pool_maxsize=config.pool_size,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(config.headers)
+    session.headers["Accept-Encoding"] = accept_encoding()
+    return session
@@ -1,150 +1,114 @@
-import re
-from io import StringIO
-from string import punctuation
-from urllib.parse import unquote
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 
-from .base import WikiScraper
+from utils.metrics import metrics
+
+from .base import PageNotFound, WikiScraper
+from .fingerprint import simhash
+from .links import canonical_title, content_links, scan_links
+from .page import PageExtract, ParsedPage, page_revision
+from .summary import SummaryScanner, paragraph_summary
+from .tables import iter_tables, nth_table
+from .tokenizer import count_words, iter_words
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@metrics.timed("extract_page")
+def extract_page(html_content: str) -> PageExtract:
+    # Module-level so that crawls can run it in worker processes.
+    page = ParsedPage(html_content)
+    counts = count_words(page.content_strings())
+    return PageExtract(
+        counts,
+        content_links(page.content),
+        canonical_title(page.soup),
+        simhash(counts),
+        page_revision(html_content),
+    )
+
+
+def extract_links(html_content: str) -> PageExtract:
+    # Link-only crawls skip the tree and the word counts altogether.
+    return PageExtract(Counter(), scan_links(html_content))
 
 
 class StardewScraper(WikiScraper):
     def _fetch_url(self, search_phrase: str) -> str:
         formatted_phrase = search_phrase.strip().replace(" ", "_")
-        url = f"{self.config.wiki_url}/{formatted_phrase}"
-        response = requests.get(url, timeout=self.config.timeout)
-        if response.status_code < 400:
-            return url
+        return f"{self.config.wiki_url}/{formatted_phrase}"
 
-        try:
-            return self._fallback_fetch_url(search_phrase)
-        except (requests.RequestException, ValueError) as e:
-            raise ValueError(f"Failed to fetch URL for '{search_phrase}': {e}") from e
-
-    def parse_summary(self, html_content: str) -> str:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        content_div = soup.find('div', {'id': 'mw-content-text'})
+    @metrics.timed("parse_summary")
+    def parse_summary(self, html_content: str | ParsedPage) -> str:
+        content_div = ParsedPage.of(html_content).content
         if not content_div:
             raise ValueError("No content div found.")
 
         paragraphs = content_div.find_all("p")
         for p in paragraphs:
-            raw_text = p.get_text(separator=" ", strip=True)
-            clean_text = raw_text.replace(" .", ".").replace(" '", "'").replace(" ,", ",")
-            if len(raw_text) > 30:
-                return ' '.join(clean_text.split())
+            summary = paragraph_summary(p.strings)
+            if summary is not None:
+                return summary
 
         raise ValueError("No suitable summary found.")
 
-    def extract_tables(self, html_content: str) -> list[pd.DataFrame]:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        found_tags = soup.find_all('table', {'class': re.compile(r'wikitable')})
-
-        dfs = []
-        for tag in found_tags:
-            first_row = tag.find('tr')
-            is_first_col_header = False
-            if first_row:
-                first_cell = first_row.find(['td', 'th'])
-                if first_cell and first_cell.name == 'th':
-                    is_first_col_header = True
-
-            index_col_param = 0 if is_first_col_header else None
-            df_list = pd.read_html(
-                StringIO(str(tag)),
-                header=0,
-                index_col=index_col_param
-            )
-            if df_list:
-                dfs.append(df_list[0])
-
-        return dfs
-
-    def extract_all_words(self, html_content: str) -> pd.DataFrame:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        main_content = soup.find('div', id='mw-content-text')
-
-        if not main_content:
-            return pd.DataFrame(columns=['word'])
-
-        for junk in main_content.find_all(['style', 'script']):
-            junk.decompose()
-
-        raw_text = main_content.get_text(separator=' ').lower()
-
-        extra_punctuation = "“”„”«»–—"
-        to_remove = punctuation.replace("'", "") + extra_punctuation
-
-        table = str.maketrans(to_remove, ' ' * len(to_remove))
-        clean_text = raw_text.translate(table)
+    @metrics.timed("fetch_summary")
+    def fetch_summary(self, subpage: str) -> str:
+        # Reads the page only up to its summary paragraph, then drops the connection.
+        scanner = SummaryScanner()
+        try:
+            found = self._stream_text(self._fetch_url(subpage), scanner)
+            if not found:
+                with metrics.timer("fallback_fetch_url"):
+                    url = self._fallback_fetch_url(subpage)
+                found = self._stream_text(url, scanner)
+        except requests.exceptions.RequestException as e:
+            raise ConnectionError(f"Request error for {subpage}: {e}") from e
+        if not found:
+            raise PageNotFound(f"Page not found: '{subpage}'")
+        return scanner.result()
 
-        words_list = clean_text.split()
+    @metrics.timed("extract_tables")
+    def extract_tables(self, html_content: str | ParsedPage) -> list[pd.DataFrame]:
+        return list(iter_tables(html_content))
 
-        filtered_words = [
-            word.strip("'") for word in words_list
-            if word.strip("'") and not word.isdigit() and len(word.strip("'")) > 1
-        ]
-        return pd.DataFrame(filtered_words, columns=['word'])
+    @metrics.timed("extract_table")
+    def extract_table(self, html_content: str | ParsedPage, number: int) -> pd.DataFrame:
+        return nth_table(html_content, number)
 
-    def fetch_page_redirections(self, html_content: str) -> list[str]:
-        # 'url' here actually contains the HTML content; name kept to match base class signature.
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def iter_tables(self, html_content: str | ParsedPage) -> Iterator[pd.DataFrame]:
+        return iter_tables(html_content)
 
-        content_div = soup.select_one('div#mw-content-text')
-        if not content_div:
-            return []
-
-        blocked_namespaces = {
-            # some are unnecessary to block, but this is a good starting point
-            'file',
-            'image',
-            'category',
-            'special',
-            'help',
-            'talk',
-            'user',
-            'user talk',
-            'template',
-            'template talk',
-            'mediawiki',
-            'mediawiki talk',
-            'module',
-            'module talk',
-            'portal',
-            'draft',
-            'timedtext',
-            'mailto',
-            'tel',
-            'javascript',
-            'datei',
-        }
+    @metrics.timed("extract_all_words")
+    def extract_all_words(self, html_content: str | ParsedPage) -> pd.DataFrame:
+        import pandas as pd
 
-        def process_href(href: str) -> str | None:
-            if href.lower().startswith(('/#', '/wiki/#', '//')):
-                return None
+        return pd.DataFrame(list(self.iter_all_words(html_content)), columns=['word'])
 
-            path = href.split('#')[0].split('?')[0].lstrip('/')
-            if not path:
-                return None
+    @metrics.timed("count_all_words")
+    def count_all_words(self, html_content: str | ParsedPage) -> Counter:
+        return count_words(ParsedPage.of(html_content).content_strings())
 
-            candidate = path.split('/', 1)[0]
-            title = unquote(candidate).replace('_', ' ').strip()
-            if not title:
-                return None
+    def iter_all_words(self, html_content: str | ParsedPage) -> Iterator[str]:
+        return iter_words(ParsedPage.of(html_content).content_strings())
 
-            if ':' in title:
-                ns = title.split(':', 1)[0].lower()
-                if ns in blocked_namespaces:
-                    return None
+    @metrics.timed("fetch_page_redirections")
+    def fetch_page_redirections(self, html_content: str | ParsedPage) -> list[str]:
+        if isinstance(html_content, ParsedPage):
+            return content_links(html_content.content)
+        return scan_links(html_content)
 
-            return title
+    def extractor(self) -> Callable[[str], PageExtract]:
+        return extract_page
 
-        raw_links = (a['href'] for a in content_div.select('a[href^="/"]'))
-        titles = (process_href(href) for href in raw_links)
-        return list(dict.fromkeys(t for t in titles if t is not None))
+    def link_extractor(self) -> Callable[[str], PageExtract]:
+        return extract_links
 
     def _google_api_handler(self, search_phrase: str) -> str:
         # Using Serper.dev API to search for the page URL on the wiki
@@ -155,8 +119,7 @@ class StardewScraper(WikiScraper):
             'X-API-KEY': self.config.api_keys["X-API-KEY"],
             'Content-Type': 'application/json',
         }
-        response = requests.request(
-            "POST",
+        response = self.session.post(
             url,
             headers=headers,
             json=payload,
@@ -173,7 +136,17 @@ class StardewScraper(WikiScraper):
             )
             return organic[0]['link']
 
-        raise ValueError("No site found and fallback search failed.")
+        raise PageNotFound("No site found and fallback search failed.")
 
     def _fallback_fetch_url(self, search_phrase: str) -> str:
-        return self._google_api_handler(search_phrase)
+        if not self.config.api_keys.get("X-API-KEY"):
+            # The search fallback is optional; without its key a missing page is simply not found.
+            raise PageNotFound(
+                f"Page not found: '{search_phrase}' (no X-API-KEY for the fallback search)"
+            )
+        try:
+            return self._google_api_handler(search_phrase)
+        except PageNotFound as e:
+            raise PageNotFound(f"Page not found: '{search_phrase}' ({e})") from e
+        except (requests.RequestException, KeyError, ValueError) as e:
+            raise ValueError(f"Failed to fetch URL for '{search_phrase}': {e}") from e
@@ -1,7 +1,12 @@
 from pathlib import Path
 
 
+from utils.metrics import metrics
+
+from .base import STREAM_CHUNK_SIZE, PageNotFound
+from .compression import codec_of, find_html, read_dictionaries, read_html
 from .stardew import StardewScraper
+from .summary import SummaryScanner
 
 
 class StardewFileScraper(StardewScraper):
@@ -14,13 +19,40 @@ class StardewFileScraper(StardewScraper):
                 f"Configured html_path does not exist: {self.html_path} "
                 f"(config base_dir: {base_dir})"
             )
+        # zstd dictionaries of snapshots compressed with --compress-html.
+        self.dictionaries = read_dictionaries(self.html_path)
 
+    @metrics.timed("fetch_page")
     def fetch_page(self, subpage: str) -> str:
         path = self._fetch_url(subpage)
-        if not path.exists():
-            raise FileNotFoundError(f"Local HTML file not found for '{subpage}': {path}")
+        if codec_of(path):
+            return read_html(path, dictionaries=self.dictionaries)
         with open(path, 'r', encoding='utf-8') as f:
             return f.read()
 
+    @metrics.timed("fetch_summary")
+    def fetch_summary(self, subpage: str) -> str:
+        path = self._fetch_url(subpage)
+        scanner = SummaryScanner()
+        if codec_of(path):
+            scanner.feed(read_html(path, dictionaries=self.dictionaries))
+            scanner.close()
+            return scanner.result()
+        with open(path, 'r', encoding='utf-8') as f:
+            while (chunk := f.read(STREAM_CHUNK_SIZE)) and not scanner.feed(chunk):
+                pass
+        scanner.close()
+        return scanner.result()
+
     def _fetch_url(self, search_phrase: str) -> Path:
-        return self.html_path / Path(search_phrase.strip().replace(" ", "_") + ".html")
+        stem = search_phrase.strip().replace(" ", "_")
+        path = find_html(self.html_path, stem)
+        if path is None:
+            path = self.html_path / f"{stem}.html"
+            raise PageNotFound(f"Local HTML file not found for '{search_phrase}': {path}")
+        return path
+
+    def ingest(self, store, source: Path | None = None, *, workers: int | None = None) -> int:
+        from .bulk import ingest
+
+        return ingest(source or self.html_path, store, workers=workers)
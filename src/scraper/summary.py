@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from lxml import etree
+
+MIN_SUMMARY_LENGTH = 30
+
+# Strings directly inside these tags are not text to BeautifulSoup's get_text().
+_HIDDEN_STRING_TAGS = frozenset({'script', 'style', 'template', 'rt', 'rp'})
+
+
+def paragraph_summary(strings: Iterable[str]) -> str | None:
+    # The summary a paragraph's strings make, if it is long enough to be one.
+    raw_text = " ".join(s for s in (string.strip() for string in strings) if s)
+    if len(raw_text) <= MIN_SUMMARY_LENGTH:
+        return None
+    clean_text = raw_text.replace(" .", ".").replace(" '", "'").replace(" ,", ",")
+    return ' '.join(clean_text.split())
+
+
+class _ScanDone(Exception):
+    pass
+
+
+class _SummaryTarget:
+    # lxml parser target following the same start/end/data events BeautifulSoup's lxml builder
+    # turns into a tree. Text nodes are rebuilt from data() calls, which chunking may split.
+    def __init__(self):
+        self.summary: str | None = None
+        self.found_content = False
+        self._content_depth = 0
+        self._paragraph_depth = 0
+        self._hidden_depth = 0
+        self._strings: list[str] = []
+        self._text: list[str] = []
+
+    def start(self, tag: str, attrib) -> None:
+        self._end_string()
+        if self._paragraph_depth:
+            self._paragraph_depth += 1
+            self._hidden_depth += tag in _HIDDEN_STRING_TAGS
+        elif self._content_depth:
+            self._content_depth += 1
+            if tag == 'p':
+                self._paragraph_depth = 1
+        elif tag == 'div' and attrib.get('id') == 'mw-content-text' and not self.found_content:
+            self.found_content = True
+            self._content_depth = 1
+
+    def end(self, tag: str) -> None:
+        self._end_string()
+        if self._paragraph_depth:
+            self._paragraph_depth -= 1
+            self._hidden_depth -= tag in _HIDDEN_STRING_TAGS
+            if self._paragraph_depth:
+                return
+            self.summary = paragraph_summary(self._strings)
+            self._strings.clear()
+            if self.summary is not None:
+                raise _ScanDone
+        if self._content_depth:
+            self._content_depth -= 1
+            if not self._content_depth:
+                # Only the first content div counts, as with soup.find().
+                raise _ScanDone
+
+    def data(self, data: str) -> None:
+        if self._paragraph_depth and not self._hidden_depth:
+            self._text.append(data)
+
+    def comment(self, _text: str) -> None:
+        self._end_string()
+
+    def close(self) -> None:
+        pass
+
+    def _end_string(self) -> None:
+        if self._text:
+            self._strings.append("".join(self._text))
+            self._text.clear()
+
+
+class SummaryScanner:
+    # Incremental counterpart of StardewScraper.parse_summary(): fed a page chunk by chunk, it
+    # finds the same first long <p> of #mw-content-text without building a tree, so reading
+    # the page can stop there.
+    def __init__(self):
+        self._target = _SummaryTarget()
+        self._parser = etree.HTMLParser(target=self._target)
+        self.done = False
+
+    def feed(self, chunk: str | bytes) -> bool:
+        # True once the rest of the page cannot change the result.
+        if not self.done:
+            try:
+                self._parser.feed(chunk)
+            except _ScanDone:
+                self.done = True
+        return self.done
+
+    def close(self) -> None:
+        if not self.done:
+            self.done = True
+            try:
+                self._parser.close()
+            except _ScanDone:
+                pass
+
+    def result(self) -> str:
+        if self._target.summary is not None:
+            return self._target.summary
+        if not self._target.found_content:
+            raise ValueError("No content div found.")
+        raise ValueError("No suitable summary found.")
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from bs4 import Tag
+
+from .page import ParsedPage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_WIKITABLE_RE = re.compile(r"wikitable")
+_HIDDEN_RE = re.compile(r"display:\s*none")
+_WHITESPACE_RE = re.compile(r"[\r\n]+|\s{2,}")
+_THOUSANDS_RE = r"(?<=\d),(?=\d{3}(?:\D|$))"
+
+
+def iter_table_tags(page: str | ParsedPage) -> Iterator[Tag]:
+    # Walks the document lazily, so looking for table N stops right after finding it.
+    for tag in ParsedPage.of(page).soup.descendants:
+        if (
+            isinstance(tag, Tag)
+            and tag.name == "table"
+            and _WIKITABLE_RE.search(" ".join(tag.get("class", ())))
+        ):
+            yield tag
+
+
+def iter_tables(page: str | ParsedPage) -> Iterator[pd.DataFrame]:
+    for tag in iter_table_tags(page):
+        yield table_to_frame(tag)
+
+
+def nth_table(page: str | ParsedPage, number: int) -> pd.DataFrame:
+    if number < 1:
+        raise ValueError("Table number must be at least 1.")
+    for i, tag in enumerate(iter_table_tags(page), start=1):
+        if i == number:
+            return table_to_frame(tag)
+    raise ValueError("Table number exceeds number of tables.")
+
+
+def table_grid(table: Tag) -> list[list[str | None]]:
+    # Rows of cell texts with rowspan/colspan cells repeated in every slot they cover,
+    # the way pandas.read_html lays them out.
+    grid: list[list[str | None]] = []
+    spans: dict[int, tuple[int, str | None]] = {}
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table or _is_hidden(tr):
+            continue
+        row: list[str | None] = []
+        for cell in tr.find_all(["td", "th"], recursive=False):
+            if _is_hidden(cell):
+                continue
+            _fill_spans(row, spans)
+            text = _cell_text(cell)
+            rowspan = _span(cell, "rowspan")
+            for _ in range(_span(cell, "colspan")):
+                if rowspan > 1:
+                    spans[len(row)] = (rowspan - 1, text)
+                row.append(text)
+        _fill_spans(row, spans)
+        grid.append(row)
+
+    width = max((len(row) for row in grid), default=0)
+    return [row + [None] * (width - len(row)) for row in grid]
+
+
+def _fill_spans(row: list[str | None], spans: dict[int, tuple[int, str | None]]) -> None:
+    # Cells spanning down from earlier rows that start at the row's next slot.
+    while len(row) in spans:
+        left, text = spans.pop(len(row))
+        if left > 1:
+            spans[len(row)] = (left - 1, text)
+        row.append(text)
+
+
+def table_to_frame(table: Tag) -> pd.DataFrame:
+    import pandas as pd
+
+    grid = table_grid(table)
+    if not grid:
+        raise ValueError("Table has no rows.")
+
+    columns = _column_names(grid[0])
+    df = pd.DataFrame(grid[1:], columns=columns)
+    for column in columns:
+        df[column] = _infer_numeric(df[column])
+
+    # A header cell in the first column marks it as the row labels.
+    first_row = next((tr for tr in table.find_all("tr") if tr.find_parent("table") is table), None)
+    first_cell = first_row.find(["td", "th"], recursive=False) if first_row else None
+    if first_cell is not None and first_cell.name == "th":
+        df = df.set_index(columns[0])
+    return df
+
+
+def _cell_text(cell: Tag) -> str | None:
+    hidden = {id(tag) for tag in cell.find_all(style=_HIDDEN_RE)}
+    strings = (
+        s for s in cell.strings
+        if not hidden or not any(id(parent) in hidden for parent in s.parents)
+    )
+    text = _WHITESPACE_RE.sub(" ", "".join(strings)).strip()
+    return text or None
+
+
+def _is_hidden(tag: Tag) -> bool:
+    return bool(_HIDDEN_RE.search(tag.get("style", "")))
+
+
+def _span(cell: Tag, attr: str) -> int:
+    try:
+        return max(1, int(cell.get(attr, 1)))
+    except ValueError:
+        return 1
+
+
+def _column_names(header: list[str | None]) -> list[str]:
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for i, name in enumerate(header):
+        name = name if name is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _infer_numeric(column: pd.Series) -> pd.Series:
+    import pandas as pd
+
+    if column.isna().all():
+        return column.astype("float64")
+    try:
+        return pd.to_numeric(column.str.replace(_THOUSANDS_RE, "", regex=True))
+    except (ValueError, TypeError):
+        return column
@@ -0,0 +1,25 @@
+import re
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from string import punctuation
+
+EXTRA_PUNCTUATION = "“”„”«»–—"
+SEPARATORS = punctuation.replace("'", "") + EXTRA_PUNCTUATION
+
+# A token is a run of characters that are neither whitespace nor separators, which is exactly
+# what translating separators to spaces and calling str.split() used to produce.
+_TOKEN_RE = re.compile(rf"[^\s{re.escape(SEPARATORS)}]+")
+
+
+def iter_words(strings: Iterable[str]) -> Iterator[str]:
+    for text in strings:
+        for raw in _TOKEN_RE.findall(text.lower()):
+            if raw.isdigit():
+                continue
+            word = raw.strip("'")
+            if len(word) > 1:
+                yield word
+
+
+def count_words(strings: Iterable[str]) -> Counter:
+    return Counter(iter_words(strings))
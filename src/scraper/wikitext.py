@@ -0,0 +1,24 @@
+import re
+
+_WIKI_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_WIKI_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+_WIKI_TEMPLATE = re.compile(r"\{\{[^{}]*\}\}")
+_WIKI_MEDIA_LINK = re.compile(r"\[\[(?:file|image|category):[^\[\]]*\]\]", re.I)
+_WIKI_LINK = re.compile(r"\[\[(?:[^|\[\]]*\|)?([^\[\]]*)\]\]")
+_WIKI_EXTERNAL_LINK = re.compile(r"\[(?:https?:)?//\S+\s*([^\]]*)\]")
+_WIKI_TAG = re.compile(r"</?[a-z][^>]*>", re.I)
+_WIKI_MARKUP = re.compile(r"'{2,}|^[=*#:;!|{}\-]+|[=]+$|\|\||!!|\{\||\|\}", re.M)
+
+
+def wikitext_to_text(text: str) -> str:
+    # A rough rendering that keeps prose, link labels and table cells; templates are dropped
+    # since their expansion needs the wiki itself.
+    text = _WIKI_REF.sub(" ", _WIKI_COMMENT.sub(" ", text))
+    previous = None
+    while previous != text:
+        previous, text = text, _WIKI_TEMPLATE.sub(" ", text)
+    text = _WIKI_MEDIA_LINK.sub(" ", text)
+    text = _WIKI_LINK.sub(r"\1", text)
+    text = _WIKI_EXTERNAL_LINK.sub(r"\1", text)
+    text = _WIKI_TAG.sub(" ", text)
+    return _WIKI_MARKUP.sub(" ", text)
@@ -1,3 +1,4 @@
 from .config import ConfigLoader
+from .metrics import JsonLogSink, Metrics, PrometheusFileSink, metrics
 
-__all__ = ["ConfigLoader"]
+__all__ = ["ConfigLoader", "JsonLogSink", "Metrics", "PrometheusFileSink", "metrics"]
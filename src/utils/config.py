@@ -21,6 +21,15 @@ def _default_config() -> dict:
         "word_freq_lang": "en",
         "json_path": "./word-counts.json",
         "mode": "stardew_normal",
+        "pool_size": 10,
+        "max_retries": 3,
+        "retry_backoff": 0.5,
+        "cache_dir": None,
+        "cache_ttl": 3600,
+        "cache_max_mb": 512,
+        "cache_compression": "auto",
+        "offline": False,
+        "max_memory_mb": 0,
         "is_debug": 0
     }
 
@@ -59,9 +68,16 @@ class ConfigLoader:
     def wiki_url(self) -> str:
         return self.config.get("wiki_url")
 
+    @property
+    def api_url(self) -> str:
+        return self.config.get("api_url") or f"{self.wiki_url}/mediawiki/api.php"
+
     @property
     def headers(self) -> dict:
-        return {"User-Agent": self.config.get("user_agent")}
+        headers = {"User-Agent": self.config.get("user_agent")}
+        if self.config.get("accept-language"):
+            headers["Accept-Language"] = self.config.get("accept-language")
+        return headers
 
     @property
     def is_debug(self) -> bool:
@@ -75,10 +91,99 @@ class ConfigLoader:
     def timeout(self) -> int:
         return self.config.get("request_timeout")
 
+    @property
+    def pool_size(self) -> int:
+        return self.config.get("pool_size")
+
+    @property
+    def max_retries(self) -> int:
+        return self.config.get("max_retries")
+
+    @property
+    def retry_backoff(self) -> float:
+        return self.config.get("retry_backoff")
+
+    @property
+    def cache_dir(self) -> Path | None:
+        cache_dir = self.config.get("cache_dir")
+        return None if cache_dir is None else self._resolve_path(cache_dir)
+
+    @property
+    def cache_ttl(self) -> float:
+        return self.config.get("cache_ttl")
+
+    @property
+    def cache_max_mb(self) -> int:
+        return self.config.get("cache_max_mb")
+
+    @property
+    def cache_compression(self) -> str:
+        return self.config.get("cache_compression")
+
+    @property
+    def offline(self) -> bool:
+        return self.config.get("offline")
+
+    @property
+    def max_memory_mb(self) -> int:
+        return self.config.get("max_memory_mb")
+
+    @property
+    def spill_dir(self) -> Path | None:
+        spill_dir = self.config.get("spill_dir")
+        return None if spill_dir is None else self._resolve_path(spill_dir)
+
+    @property
+    def metrics_path(self) -> Path | None:
+        metrics_path = self.config.get("metrics_path")
+        return None if metrics_path is None else self._resolve_path(metrics_path)
+
+    @property
+    def lang_freq_dir(self) -> Path:
+        lang_freq_dir = self.config.get("lang_freq_dir")
+        if lang_freq_dir is None:
+            return self.base_dir / ".lang-freq"
+        return self._resolve_path(lang_freq_dir)
+
     @property
     def json_path(self) -> Path:
         return self._resolve_path(self.config.get("json_path"))
 
+    @property
+    def word_store_path(self) -> Path:
+        store_path = self.config.get("word_store_path")
+        if store_path is None:
+            return self.json_path.with_suffix(".sqlite")
+        return self._resolve_path(store_path)
+
+    @property
+    def alias_path(self) -> Path:
+        alias_path = self.config.get("alias_path")
+        if alias_path is None:
+            return self.json_path.with_suffix(".aliases.sqlite")
+        return self._resolve_path(alias_path)
+
+    @property
+    def graph_dir(self) -> Path:
+        graph_dir = self.config.get("graph_dir")
+        if graph_dir is None:
+            return self.json_path.with_suffix(".graph")
+        return self._resolve_path(graph_dir)
+
+    @property
+    def journal_path(self) -> Path:
+        journal_path = self.config.get("journal_path")
+        if journal_path is None:
+            return self.json_path.with_suffix(".crawl.sqlite")
+        return self._resolve_path(journal_path)
+
+    @property
+    def work_queue_path(self) -> Path:
+        work_queue_path = self.config.get("work_queue_path")
+        if work_queue_path is None:
+            return self.json_path.with_suffix(".queue.sqlite")
+        return self._resolve_path(work_queue_path)
+
     @property
     def word_freq_lang(self) -> str:
         return self.config.get("word_freq_lang")
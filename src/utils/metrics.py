@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def snapshot(self) -> dict:
+        buckets = dict(zip(map(str, BUCKETS), self.counts))
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class Profiler:
+    # One cProfile per stage. Only one profiler can be active in a process, so stages are profiled
+    # on one thread at a time: stages entered while another is profiled (on any thread, including
+    # nested ones) run unprofiled, and with several workers each profile is a sample of the stage.
+    def __init__(self):
+        self._profiles: dict = {}
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self._active.acquire(blocking=False):
+            yield
+            return
+
+        import cProfile
+
+        try:
+            with self._lock:
+                profile = self._profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+        finally:
+            self._active.release()
+
+    def dump(self, output_dir: Path) -> list[Path]:
+        import pstats
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            profiles = dict(self._profiles)
+
+        paths = []
+        for name, profile in profiles.items():
+            path = output_dir / f"{name}.prof"
+            pstats.Stats(profile).dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self.sinks: list[Callable[[dict], None]] = []
+        self.profiler: Profiler | None = None
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            if self.profiler is not None:
+                with self.profiler.stage(name):
+                    yield
+            else:
+                yield
+        except Exception:
+            self.inc(f"{name}_errors")
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "counters": dict(self.counters),
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+    def add_sink(self, sink: Callable[[dict], None]) -> None:
+        self.sinks.append(sink)
+
+    def emit(self) -> None:
+        if not self.sinks:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink(snapshot)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+class JsonLogSink:
+    def __init__(self, target: Path | TextIO = sys.stderr):
+        self.target = target
+
+    def __call__(self, snapshot: dict) -> None:
+        line = json.dumps(snapshot, sort_keys=True)
+        if isinstance(self.target, (str, Path)):
+            with open(self.target, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        else:
+            print(line, file=self.target, flush=True)
+
+
+class PrometheusFileSink:
+    def __init__(self, path: Path, prefix: str = "wikiscraper"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def __call__(self, snapshot: dict) -> None:
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines += [
+                f"# TYPE {self.prefix}_{name}_total counter",
+                f"{self.prefix}_{name}_total {value}",
+            ]
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+            lines += [f"{metric}_sum {histogram['sum']}", f"{metric}_count {histogram['count']}"]
+
+        # Written atomically so a node exporter's textfile collector never reads half a file.
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def sink_for_path(path: Path) -> Callable[[dict], None]:
+    return PrometheusFileSink(path) if Path(path).suffix == ".prom" else JsonLogSink(Path(path))
+
+
+metrics = Metrics()
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+
+def process_context() -> BaseContext:
+    # Worker pools are started from processes that already run threads (fetchers, the metrics
+    # sinks), which a plain fork would copy mid-flight; forkserver or spawn start them clean.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
@@ -1,16 +1,44 @@
-from analysis import TextAnalyzer
+from typing import TYPE_CHECKING
+
+from analysis import WordCountStore
 from scraper import StardewFileScraper, StardewScraper, WikiScraper
 from utils import ConfigLoader
-from .main import crawl_subpages, main, setup_parser, get_scraper_tool
+from .main import (
+    count_all_pages,
+    crawl_node,
+    crawl_subpages,
+    discover_pages,
+    main,
+    refresh_counts,
+    setup_parser,
+    get_scraper_tool,
+)
+
+if TYPE_CHECKING:
+    from analysis import TextAnalyzer
 
 __all__ = [
     "main",
     "setup_parser",
+    "count_all_pages",
     "crawl_subpages",
+    "crawl_node",
+    "discover_pages",
+    "refresh_counts",
     "ConfigLoader",
     "WikiScraper",
     "StardewScraper",
     "StardewFileScraper",
     "get_scraper_tool",
     "TextAnalyzer",
+    "WordCountStore",
 ]
+
+
+def __getattr__(name: str):
+    # Loaded on first use so that importing the CLI does not pull in pandas.
+    if name == "TextAnalyzer":
+        from analysis import TextAnalyzer
+
+        return TextAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
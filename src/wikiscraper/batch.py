@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, TextIO
+from urllib.parse import urlparse
+
+from crawler import HostRateLimiter
+from scraper import WikiScraper, page_revision
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BATCH_ACTIONS = ("summary", "table", "tables", "count-words")
+TABLE_FORMATS = ("csv", "parquet")
+FIELDS = {
+    "summary": ["page", "summary", "error"],
+    "table": ["page", "table", "path", "rows", "error"],
+    "tables": ["page", "tables", "paths", "rows", "error"],
+    "count-words": ["page", "words", "unique", "error"],
+}
+
+
+def save_table(table: pd.DataFrame, path: str, fmt: str = "csv") -> None:
+    if fmt == "csv":
+        table.to_csv(path)
+    elif fmt == "parquet":
+        table.to_parquet(path)
+    else:
+        raise ValueError(f"Invalid table format: {fmt}")
+
+
+def read_titles(source: str) -> list[str]:
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    titles = (line.strip() for line in lines)
+    return list(dict.fromkeys(t for t in titles if t and not t.startswith("#")))
+
+
+class BatchRunner:
+    # One scraper (and so one pooled session) serves every title; each page's word counts and
+    # revision are kept in memory and handed to the caller once the whole batch is done.
+    def __init__(
+        self,
+        scraper: WikiScraper,
+        action: str,
+        *,
+        workers: int = 4,
+        rps: float | None = None,
+        table_number: int = 1,
+        table_format: str = "csv",
+    ):
+        if action not in BATCH_ACTIONS:
+            raise ValueError(f"Invalid batch action: {action}")
+        self.scraper = scraper
+        self.action = action
+        self.workers = max(1, workers)
+        self.limiter = HostRateLimiter(rps)
+        self.host = urlparse(scraper.config.wiki_url or "").netloc
+        self.table_number = table_number
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"Invalid table format: {table_format}")
+        self.table_format = table_format
+        self.page_counts: dict[str, tuple[Counter, int | None]] = {}
+
+    def run(self, titles: Iterable[str]) -> Iterator[dict]:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            # map() keeps the input order, so records stream out in the order titles came in.
+            for record, counted in pool.map(self._process, titles):
+                if counted:
+                    self.page_counts[record["page"]] = counted
+                yield record
+
+    def _process(self, title: str) -> tuple[dict, tuple[Counter, int | None] | None]:
+        try:
+            self.limiter.acquire(self.host)
+            if self.action == "summary":
+                return {"page": title, "summary": self.scraper.fetch_summary(title)}, None
+            if self.action == "count-words":
+                html = self.scraper.fetch_counted_page(title)
+                counts = self.scraper.count_all_words(html)
+                record = {"page": title, "words": sum(counts.values()), "unique": len(counts)}
+                return record, (counts, page_revision(html))
+            html = self.scraper.fetch_page(title)
+            if self.action == "tables":
+                return self._save_tables(title, html), None
+            return self._save_table(title, html), None
+        except Exception as e:
+            return {"page": title, "error": str(e)}, None
+
+    def _save_table(self, title: str, html: str) -> dict:
+        table = self.scraper.extract_table(html, self.table_number)
+        path = f"{title}_{self.table_number}.{self.table_format}"
+        save_table(table, path, self.table_format)
+        return {"page": title, "table": self.table_number, "path": path, "rows": len(table)}
+
+    def _save_tables(self, title: str, html: str) -> dict:
+        # Tables are converted and written one at a time; a page's tables are never all in memory.
+        paths, rows = [], 0
+        for number, table in enumerate(self.scraper.iter_tables(html), start=1):
+            path = f"{title}_{number}.{self.table_format}"
+            save_table(table, path, self.table_format)
+            paths.append(path)
+            rows += len(table)
+        return {"page": title, "tables": len(paths), "paths": paths, "rows": rows}
+
+
+def write_records(records: Iterable[dict], action: str, fmt: str, out: TextIO) -> int:
+    written = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS[action])
+        writer.writeheader()
+        for record in records:
+            # List fields (e.g. the paths of "tables") are written as JSON arrays.
+            writer.writerow({
+                key: json.dumps(value, ensure_ascii=False) if isinstance(value, list) else value
+                for key, value in record.items()
+            })
+            written += 1
+    elif fmt == "jsonl":
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    else:
+        raise ValueError(f"Invalid output format: {fmt}")
+    return written
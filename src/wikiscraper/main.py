@@ -1,13 +1,41 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import sys
+from concurrent.futures import Future
 from pathlib import Path
-from time import sleep
-
-from analysis import TextAnalyzer
-from scraper import StardewFileScraper, StardewScraper, WikiScraper
+from typing import TextIO
+
+# pandas, matplotlib, seaborn and wordfreq are imported by the commands that need them
+# (through analysis.TextAnalyzer), so that e.g. --summary starts without loading them.
+from analysis import WordCountStore
+from crawler import (
+    FRONTIER_STRATEGIES,
+    WORK_QUEUE_BACKENDS,
+    AliasMap,
+    ConcurrentCrawler,
+    CrawlJournal,
+    WorkQueue,
+    make_frontier,
+    make_work_queue,
+    rps_from_wait,
+)
+from scraper import (
+    COMPRESSIONS,
+    MediaWikiApiScraper,
+    PageExtract,
+    PageNotFound,
+    StardewFileScraper,
+    StardewScraper,
+    WikiScraper,
+    compress_snapshots,
+    page_revision,
+)
 from utils import ConfigLoader
+from utils.metrics import Profiler, metrics, sink_for_path
+
+from .batch import BATCH_ACTIONS, TABLE_FORMATS, BatchRunner, read_titles, save_table, write_records
 
 
 def setup_parser() -> argparse.ArgumentParser:
@@ -48,6 +76,78 @@ def setup_parser() -> argparse.ArgumentParser:
         help="Automatically follow links and count words recursively starting from this page.",
     )
 
+    parser.add_argument(
+        "--discover",
+        type=str,
+        help="Follow links from this page without counting words and list every page found, one "
+             "title per line (to --output or stdout), e.g. as input for --batch. Honors --depth, "
+             "--limit and --strategy.",
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Recount the pages already in the word counts: pages with an unchanged revision are "
+             "skipped, changed ones replace their old counts.",
+    )
+
+    parser.add_argument(
+        "--all-pages",
+        action="store_true",
+        help="Count words on every article of the wiki as listed by its API, without following "
+             "links (mediawiki_api mode; stops after --limit pages if set).",
+    )
+
+    parser.add_argument(
+        "--ingest",
+        type=str,
+        nargs="?",
+        const="",
+        help="Count words on every saved page in a directory, a .tar/.zip archive of HTML files "
+             "or a MediaWiki XML dump (default: html_path from config.json).",
+    )
+
+    parser.add_argument(
+        "--compress-html",
+        type=str,
+        nargs="?",
+        const="",
+        help="Rewrite every saved page in a directory compressed, training a shared zstd "
+             "dictionary first (default: html_path from config.json). The file backend reads them "
+             "as before.",
+    )
+
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=COMPRESSIONS,
+        default="auto",
+        help="For --compress-html: Codec to store pages with; auto picks zstd, then br, then gzip, "
+             "whichever is installed, and none restores plain files (default: auto).",
+    )
+
+    parser.add_argument(
+        "--batch",
+        type=str,
+        help="Process every page title listed in this file ('-' for stdin), one per line, "
+             "over a single shared session. Combine with --batch-action.",
+    )
+
+    parser.add_argument(
+        "--export-graph",
+        type=str,
+        help="Export the link graph recorded by --auto-count-words --graph to this file; "
+             "the format follows the extension (.csv, .parquet or .graphml).",
+    )
+
+    parser.add_argument(
+        "--shortest-path",
+        type=str,
+        nargs=2,
+        metavar=("FROM", "TO"),
+        help="Print the shortest chain of links between two pages of the recorded link graph.",
+    )
+
     parser.add_argument(
         "--analyze-relative-word-frequency",
         action="store_true",
@@ -56,11 +156,70 @@ def setup_parser() -> argparse.ArgumentParser:
     )
 
     # --- Modifiers (Secondary Arguments) ---
+    parser.add_argument(
+        "--batch-action",
+        type=str,
+        choices=BATCH_ACTIONS,
+        default="summary",
+        help="For --batch: What to do with each page (default: summary). "
+             "tables saves every table of every page; "
+             "count-words applies one aggregated update to the word counts at the end.",
+    )
+
+    parser.add_argument(
+        "--table-format",
+        type=str,
+        choices=TABLE_FORMATS,
+        default="csv",
+        help="For --table and --batch-action table/tables: File format of saved tables "
+             "(default: csv; parquet requires pyarrow).",
+    )
+
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["jsonl", "csv"],
+        default="jsonl",
+        help="For --batch: Output format of the per-page results (default: jsonl).",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="For --batch and --discover: Write results to this file instead of stdout.",
+    )
+
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve pages only from the page cache (requires cache_dir in config.json).",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        help="Write crawl/scrape metrics to this path: Prometheus text format for a .prom file, "
+             "JSON lines otherwise.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Profile each stage with cProfile and save <stage>.prof files to this directory.",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk page cache for this run.",
+    )
+
     parser.add_argument(
         "--number",
         type=int,
         default=1,
-        help="For --table: Specify which table index to extract (default: 1).",
+        help="For --table and --batch-action table: Specify which table index to extract "
+             "(default: 1).",
     )
 
     parser.add_argument(
@@ -98,9 +257,116 @@ def setup_parser() -> argparse.ArgumentParser:
         help="For --auto-count-words: Delay in seconds between fetches (default: 1).",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="For --auto-count-words and --batch: Number of pages fetched concurrently "
+             "(default: 1, 4 for --batch). "
+             "For --ingest: Number of worker processes (default: CPU count).",
+    )
+
+    parser.add_argument(
+        "--rps",
+        type=float,
+        help="For --auto-count-words and --batch: Maximum requests per second per host. "
+             "For crawls it overrides --wait (default: 1 / --wait).",
+    )
+
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="For --auto-count-words: Number of processes parsing fetched pages "
+             "(default: 0, parse on the main process).",
+    )
+
+    parser.add_argument(
+        "--strategy",
+        type=str,
+        choices=FRONTIER_STRATEGIES,
+        default="bfs",
+        help="For --auto-count-words: Order in which discovered pages are crawled: bfs (nearest "
+             "first) or inlinks (most linked-to first, so --limit keeps the most referenced "
+             "pages).",
+    )
+
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="For --auto-count-words and --all-pages: Stop after this many pages "
+             "(default: 0, no limit).",
+    )
+
+    parser.add_argument(
+        "--max-per-namespace",
+        type=int,
+        default=0,
+        help="For --auto-count-words: Crawl at most this many pages per namespace "
+             "(default: 0, no cap).",
+    )
+
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        help="For --auto-count-words: Memory in MB the crawl frontier and visited set may use "
+             "before spilling to disk (default: max_memory_mb from config.json, 0 for no limit).",
+    )
+
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="For --auto-count-words: Record the link graph of the crawl in graph_dir.",
+    )
+
+    parser.add_argument(
+        "--node",
+        type=str,
+        help="For --auto-count-words: Join a distributed crawl under this node name, sharing pages "
+             "with the other nodes through work_queue_path.",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="For --node: Prefer pages from shard K of N of the title hashes, as K/N "
+             "(e.g. --shard 0/4); other shards are only taken once it runs dry.",
+    )
+
+    parser.add_argument(
+        "--queue-backend",
+        type=str,
+        choices=WORK_QUEUE_BACKENDS,
+        default="sqlite",
+        help="For --node: Backend of the shared work queue (default: sqlite).",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="For --auto-count-words: Continue an interrupted crawl from its on-disk journal.",
+    )
+
+    parser.add_argument(
+        "--reset-queue",
+        action="store_true",
+        help="For --auto-count-words --node: Replace a different crawl still in progress in the "
+             "work queue.",
+    )
+
     return parser
 
 
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard: {value}. Use K/N, e.g. 0/4") from None
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Invalid shard: {value}. K must be between 0 and N - 1")
+    return index, count
+
+
 def crawl_subpages(
     start_subpage: str,
     depth: int,
@@ -109,36 +375,268 @@ def crawl_subpages(
     word_counts_path: Path,
     *,
     limit: int = 0,
+    workers: int = 1,
+    rps: float | None = None,
+    parse_workers: int = 0,
+    store: WordCountStore | None = None,
+    journal_path: Path | None = None,
+    resume: bool = False,
+    graph_dir: Path | None = None,
+    strategy: str = "bfs",
+    max_per_namespace: int = 0,
+    max_memory_mb: int = 0,
+    spill_dir: Path | None = None,
+    alias_path: Path | None = None,
 ) -> None:
-    visited, to_visit = set(), {start_subpage}
-
-    for i in range(depth):
-        print(f"Visited {len(visited)} pages")
-        print(f"iteration {i + 1}:")
+    owns_store = store is None
+    if owns_store:
+        store = WordCountStore.for_json(word_counts_path)
+    journal = CrawlJournal(journal_path) if journal_path else CrawlJournal()
+    aliases = AliasMap(alias_path) if alias_path else AliasMap()
+    graph = None
+    if graph_dir is not None:
+        from crawler import LinkGraphStore
+
+        graph = LinkGraphStore(graph_dir)
+
+    def aggregate(page_title: str, extract: PageExtract) -> list[str]:
+        # Replaces what the page contributed before, so recrawling or resuming never counts it
+        # twice.
+        store.set_page(page_title, extract.counts, revision=extract.revision)
+        if graph is not None:
+            graph.add_links(page_title, extract.links)
+        return extract.links
+
+    def checkpoint() -> None:
+        store.flush()
+        if graph is not None:
+            graph.flush()
+
+    crawler = ConcurrentCrawler(
+        scraper,
+        workers=workers,
+        rps=rps if rps is not None else rps_from_wait(wait),
+        parse_workers=parse_workers,
+    )
+    try:
+        crawler.crawl(
+            start_subpage,
+            depth,
+            scraper.extractor(),
+            aggregate,
+            limit=limit,
+            journal=journal,
+            resume=resume,
+            on_checkpoint=checkpoint,
+            frontier=make_frontier(
+                strategy,
+                max_per_namespace=max_per_namespace,
+                max_memory_mb=max_memory_mb,
+                spill_dir=spill_dir,
+            ),
+            aliases=aliases,
+        )
+        if journal.level is None:
+            aliases.forget_run(journal.run_id)
+    finally:
+        aliases.close()
+        journal.close()
+        store.export_json(word_counts_path)
+        if owns_store:
+            store.close()
+        if graph is not None:
+            link_graph = graph.compact()
+            graph.close()
+            print(
+                f"Link graph with {len(link_graph)} pages and {link_graph.edge_count} links "
+                f"saved to {graph_dir}"
+            )
 
-        if 0 < limit <= len(visited):
-            break
 
-        current_batch = to_visit - visited
-        to_visit = set()
+def discover_pages(
+    start_subpage: str,
+    depth: int,
+    wait: int,
+    scraper: WikiScraper,
+    out: TextIO,
+    *,
+    limit: int = 0,
+    workers: int = 1,
+    rps: float | None = None,
+    strategy: str = "bfs",
+    max_per_namespace: int = 0,
+) -> int:
+    # A links-only crawl: pages are scanned for links in one streaming pass, never parsed into a
+    # tree.
+    def aggregate(page_title: str, extract: PageExtract) -> list[str]:
+        out.write(f"{page_title}\n")
+        return extract.links
+
+    crawler = ConcurrentCrawler(
+        scraper, workers=workers, rps=rps if rps is not None else rps_from_wait(wait)
+    )
+    return crawler.crawl(
+        start_subpage,
+        depth,
+        scraper.link_extractor(),
+        aggregate,
+        limit=limit,
+        frontier=make_frontier(strategy, max_per_namespace=max_per_namespace),
+    )
 
-        for page in current_batch:
-            if 0 < limit <= len(visited):
-                return
 
-            print(f"Fetching {page}")
+def count_all_pages(
+    scraper: WikiScraper,
+    word_counts_path: Path,
+    *,
+    limit: int = 0,
+    store: WordCountStore | None = None,
+) -> int:
+    # Counts every article of the wiki as the API enumerates them, instead of following links.
+    if not isinstance(scraper, MediaWikiApiScraper):
+        raise ValueError("Counting all pages needs the mediawiki_api mode")
+    owns_store = store is None
+    if owns_store:
+        store = WordCountStore.for_json(word_counts_path)
+    try:
+        extract = scraper.extractor()
+        pages = 0
+        for title, html in scraper.iter_all_pages(limit):
+            extracted = extract(html)
+            store.set_page(title, extracted.counts, revision=extracted.revision)
+            pages += 1
+            metrics.inc("pages_crawled")
+        store.export_json(word_counts_path)
+        print(f"Counted words on {pages} pages")
+        return pages
+    finally:
+        if owns_store:
+            store.close()
+
+
+def refresh_counts(
+    scraper: WikiScraper,
+    word_counts_path: Path,
+    *,
+    workers: int = 1,
+    rps: float | None = None,
+    parse_workers: int = 0,
+    store: WordCountStore | None = None,
+) -> None:
+    owns_store = store is None
+    if owns_store:
+        store = WordCountStore.for_json(word_counts_path)
+    try:
+        known = dict(store.page_records())
+        # Pages whose revision is unchanged are skipped without being fetched; without revision
+        # ids the rest are fetched and only recounted if their counts differ.
+        revisions = scraper.fetch_revisions(known)
+        stale = [
+            title for title, revision in known.items()
+            if revision is None or revisions.get(title) != revision
+        ]
+        changed = removed = 0
+
+        def record(page: str, result: Future) -> None:
+            nonlocal changed, removed
             try:
-                html = scraper.fetch_page(page)
-                words = scraper.extract_all_words(html)
-                TextAnalyzer.update_word_counts_json(
-                    TextAnalyzer.sum_word_occurrences(words),
-                    word_counts_path,
-                )
-                visited.add(page)
-                to_visit.update(scraper.fetch_page_redirections(html))
-                sleep(wait)
+                extract = result.result()
+            except PageNotFound as e:
+                # Only pages the wiki reports missing are dropped; other errors keep their counts.
+                print(f"Removing {page}: {e}")
+                removed += store.remove_page(page)
             except Exception as e:
+                metrics.inc("page_errors")
                 print(f"Error processing {page}: {e}")
+            else:
+                changed += store.set_page(page, extract.counts, revision=extract.revision)
+
+        crawler = ConcurrentCrawler(scraper, workers=workers, rps=rps, parse_workers=parse_workers)
+        crawler.visit(stale, scraper.extractor(), record)
+        store.export_json(word_counts_path)
+        print(
+            f"Refreshed {len(known)} pages: {len(known) - len(stale)} unchanged revisions, "
+            f"{len(stale)} fetched, {changed} recounted, {removed} removed"
+        )
+    finally:
+        if owns_store:
+            store.close()
+
+
+def crawl_node(
+    start_subpage: str,
+    depth: int,
+    wait: int,
+    scraper: WikiScraper,
+    word_counts_path: Path,
+    queue: WorkQueue,
+    node: str,
+    *,
+    shard: tuple[int, int] | None = None,
+    workers: int = 1,
+    rps: float | None = None,
+    parse_workers: int = 0,
+    reset_queue: bool = False,
+    store: WordCountStore | None = None,
+) -> None:
+    if queue.start(start_subpage, depth, reset=reset_queue):
+        print(f"Joining crawl from {start_subpage}")
+
+    crawler = ConcurrentCrawler(
+        scraper,
+        workers=workers,
+        rps=rps if rps is not None else rps_from_wait(wait),
+        parse_workers=parse_workers,
+    )
+    crawled = crawler.work(queue, node, scraper.extractor(), shard=shard)
+    print(f"Node {node} crawled {crawled} pages")
+
+    # Only the node that sees the whole crawl finish gets the pages, so they are merged once.
+    pages = queue.take_pages()
+    if pages is None:
+        return
+    owns_store = store is None
+    if owns_store:
+        store = WordCountStore.for_json(word_counts_path)
+    try:
+        changed = sum(
+            store.set_page(title, counts, revision=revision) for title, counts, revision in pages
+        )
+        store.export_json(word_counts_path)
+        print(
+            f"Merged word counts of all nodes into {word_counts_path} "
+            f"({changed} of {len(pages)} pages changed)"
+        )
+    finally:
+        if owns_store:
+            store.close()
+
+
+def run_batch(args: argparse.Namespace, scraper: WikiScraper, config) -> None:
+    if args.number < 1:
+        raise ValueError("Table number must be at least 1.")
+
+    runner = BatchRunner(
+        scraper,
+        args.batch_action,
+        workers=args.workers or 4,
+        rps=args.rps,
+        table_number=args.number,
+        table_format=args.table_format,
+    )
+    titles = read_titles(args.batch)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            written = write_records(runner.run(titles), args.batch_action, args.format, out)
+        print(f"Saved {written} results to {args.output}")
+    else:
+        write_records(runner.run(titles), args.batch_action, args.format, sys.stdout)
+
+    if runner.page_counts:
+        with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+            for title, (counts, revision) in runner.page_counts.items():
+                store.set_page(title, counts, revision=revision)
+            store.export_json(config.json_path)
 
 
 def get_scraper_tool(config) -> WikiScraper:
@@ -146,6 +644,8 @@ def get_scraper_tool(config) -> WikiScraper:
         return StardewScraper(config)
     if config.mode == "stardew_file":
         return StardewFileScraper(config)
+    if config.mode == "mediawiki_api":
+        return MediaWikiApiScraper(config)
     raise ValueError(f"Invalid mode: {config.mode}")
 
 
@@ -154,11 +654,23 @@ def main() -> None:
     config = ConfigLoader()
 
     args = parser.parse_args()
+    if args.no_cache:
+        config.config["cache_dir"] = None
+    if args.max_memory is not None:
+        config.config["max_memory_mb"] = args.max_memory
+    if args.offline:
+        config.config["offline"] = True
+    if args.metrics:
+        config.config["metrics_path"] = args.metrics
+    if config.metrics_path is not None:
+        metrics.add_sink(sink_for_path(config.metrics_path))
+    if args.profile:
+        metrics.profiler = Profiler()
     scraper = get_scraper_tool(config)
 
     if args.summary:
         try:
-            print(scraper.parse_summary(scraper.fetch_page(args.summary)))
+            print(scraper.fetch_summary(args.summary))
         except Exception as e:
             print(f"Error processing summary: {e}")
 
@@ -167,15 +679,13 @@ def main() -> None:
             if args.number < 1:
                 raise ValueError("Table number must be at least 1.")
 
-            tables = scraper.extract_tables(scraper.fetch_page(args.table))
-
-            if args.number > len(tables):
-                raise ValueError("Table number exceeds number of tables.")
+            table = scraper.extract_table(scraper.fetch_page(args.table), args.number)
+            path = f"{args.table}_{args.number}.{args.table_format}"
+            save_table(table, path, args.table_format)
 
-            table = tables[args.number - 1]
-            table.to_csv(f"{args.table}_{args.number}.csv")
+            print(f"Table saved to {path}")
+            from analysis import TextAnalyzer
 
-            print(f"Table saved to {args.table}_{args.number}.csv")
             print(TextAnalyzer.sum_word_occurrences(table))
 
         except Exception as e:
@@ -183,20 +693,53 @@ def main() -> None:
 
     elif args.count_words:
         try:
-            words = scraper.extract_all_words(scraper.fetch_page(args.count_words))
-            word_counts = TextAnalyzer.sum_word_occurrences(words)
-            TextAnalyzer.update_word_counts_json(word_counts, config.json_path)
+            html = scraper.fetch_counted_page(args.count_words)
+            with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+                counts = scraper.count_all_words(html)
+                store.set_page(args.count_words, counts, revision=page_revision(html))
+                store.export_json(config.json_path)
 
         except Exception as e:
             print(f"Error counting words: {e}")
 
+    elif args.batch:
+        try:
+            run_batch(args, scraper, config)
+        except Exception as e:
+            print(f"Error processing batch: {e}", file=sys.stderr)
+
+    elif args.ingest is not None:
+        try:
+            from scraper import ingest
+
+            source = Path(args.ingest) if args.ingest else config.html_path
+            with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+                pages = ingest(source, store, workers=args.workers)
+                store.export_json(config.json_path)
+            print(f"Counted words on {pages} pages from {source}")
+
+        except Exception as e:
+            print(f"Error ingesting pages: {e}")
+
+    elif args.compress_html is not None:
+        try:
+            directory = Path(args.compress_html) if args.compress_html else config.html_path
+            pages, before, after = compress_snapshots(directory, args.compression)
+            print(f"Compressed {pages} pages in {directory}: {before} -> {after} bytes")
+
+        except Exception as e:
+            print(f"Error compressing pages: {e}")
+
     elif args.analyze_relative_word_frequency:
         try:
+            from analysis import TextAnalyzer
+
             df = TextAnalyzer.analyze_rel_word_freq(
                 args.mode,
                 args.count,
                 config.word_freq_lang,
-                config.json_path,
+                config.word_store_path if config.word_store_path.exists() else config.json_path,
+                table_dir=config.lang_freq_dir,
             )
             print(df)
             if args.chart:
@@ -205,15 +748,120 @@ def main() -> None:
         except Exception as e:  # pragma: no cover
             print(f"Error in analysis: {e}")
 
+    elif args.export_graph:
+        try:
+            from crawler import LinkGraph
+
+            link_graph = LinkGraph.load(config.graph_dir)
+            link_graph.export(Path(args.export_graph))
+            print(f"Link graph with {len(link_graph)} pages saved to {args.export_graph}")
+        except Exception as e:
+            print(f"Error exporting link graph: {e}")
+
+    elif args.shortest_path:
+        try:
+            from crawler import LinkGraph
+
+            path = LinkGraph.load(config.graph_dir).shortest_path(*args.shortest_path)
+            if path is None:
+                print(f"No path from {args.shortest_path[0]} to {args.shortest_path[1]}")
+            else:
+                print(" -> ".join(path))
+        except Exception as e:
+            print(f"Error finding shortest path: {e}")
+
+    elif args.discover:
+        try:
+            with contextlib.ExitStack() as stack:
+                out = sys.stdout
+                if args.output:
+                    out = stack.enter_context(open(args.output, "w", encoding="utf-8"))
+                # Crawl progress goes to stderr so that the listed titles can be piped.
+                stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+                found = discover_pages(
+                    args.discover,
+                    args.depth,
+                    args.wait,
+                    scraper,
+                    out,
+                    limit=args.limit,
+                    workers=args.workers or 1,
+                    rps=args.rps,
+                    strategy=args.strategy,
+                    max_per_namespace=args.max_per_namespace,
+                )
+                print(f"Discovered {found} pages")
+        except Exception as e:
+            print(f"Error discovering pages: {e}", file=sys.stderr)
+
+    elif args.refresh:
+        try:
+            with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+                refresh_counts(
+                    scraper,
+                    config.json_path,
+                    workers=args.workers or 1,
+                    rps=args.rps if args.rps is not None else rps_from_wait(args.wait),
+                    parse_workers=args.parse_workers,
+                    store=store,
+                )
+        except Exception as e:
+            print(f"Error refreshing word counts: {e}")
+
+    elif args.all_pages:
+        try:
+            with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+                count_all_pages(scraper, config.json_path, limit=args.limit, store=store)
+        except Exception as e:
+            print(f"Error counting all pages: {e}")
+
+    elif args.auto_count_words and args.node:
+        try:
+            with (
+                make_work_queue(args.queue_backend, config.work_queue_path) as queue,
+                WordCountStore.for_json(config.json_path, config.word_store_path) as store,
+            ):
+                crawl_node(
+                    args.auto_count_words,
+                    args.depth,
+                    args.wait,
+                    scraper,
+                    config.json_path,
+                    queue,
+                    args.node,
+                    shard=args.shard,
+                    workers=args.workers or 1,
+                    rps=args.rps,
+                    parse_workers=args.parse_workers,
+                    reset_queue=args.reset_queue,
+                    store=store,
+                )
+        except Exception as e:  # pragma: no cover
+            print(f"Error in distributed word counting: {e}")
+
     elif args.auto_count_words:
         try:
-            crawl_subpages(
-                args.auto_count_words,
-                args.depth,
-                args.wait,
-                scraper,
-                config.json_path,
-            )
+            with WordCountStore.for_json(config.json_path, config.word_store_path) as store:
+                crawl_subpages(
+                    args.auto_count_words,
+                    args.depth,
+                    args.wait,
+                    scraper,
+                    config.json_path,
+                    limit=args.limit,
+                    workers=args.workers or 1,
+                    rps=args.rps,
+                    parse_workers=args.parse_workers,
+                    store=store,
+                    journal_path=config.journal_path,
+                    resume=args.resume,
+                    graph_dir=config.graph_dir if args.graph else None,
+                    strategy=args.strategy,
+                    max_per_namespace=args.max_per_namespace,
+                    max_memory_mb=config.max_memory_mb,
+                    spill_dir=config.spill_dir,
+                    alias_path=config.alias_path,
+                )
         except Exception as e:  # pragma: no cover
             print(f"Error in auto word counting: {e}")
 
@@ -221,5 +869,19 @@ def main() -> None:
         parser.print_help()
         sys.exit(1)
 
-
-__all__ = ["main", "crawl_subpages", "setup_parser", "get_scraper_tool"]
+    metrics.emit()
+    if metrics.profiler is not None:
+        for path in metrics.profiler.dump(Path(args.profile)):
+            print(f"Profile saved to {path}")
+
+
+__all__ = [
+    "main",
+    "count_all_pages",
+    "crawl_node",
+    "discover_pages",
+    "refresh_counts",
+    "crawl_subpages",
+    "setup_parser",
+    "get_scraper_tool",
+]
@@ -1,18 +1,64 @@
 from __future__ import annotations
 
+import bz2
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections.abc import Callable
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from analysis import WordCountStore
+from crawler import AliasMap
+from crawler import BloomFilter
+from crawler import BreadthFirstFrontier
+from crawler import CompletedPage
+from crawler import DiskSeenSet
+from crawler import InLinkFrontier
+from crawler import SqliteWorkQueue
+from crawler import TokenBucket
+from scraper import PageCache
+from scraper import PageNotFound
+from scraper import compress_snapshots
+from scraper import MediaWikiApiScraper
+from scraper import ingest
+from scraper.links import content_links, scan_links
+from scraper.page import ParsedPage
+from scraper.stardew import extract_links
+from scraper.summary import SummaryScanner
+from utils import PrometheusFileSink
+from utils import metrics
+from utils.metrics import Profiler
 from wikiscraper import ConfigLoader
 from wikiscraper import StardewFileScraper
+from wikiscraper import StardewScraper
+from wikiscraper import TextAnalyzer
+from wikiscraper import count_all_pages
+from wikiscraper import crawl_node
+from wikiscraper import crawl_subpages
+from wikiscraper import discover_pages
+from wikiscraper import refresh_counts
+from wikiscraper.batch import BatchRunner, write_records
+
+
+CONFIG_PATH = Path(__file__).resolve().parent / "configs" / "config_tests.json"
 
 
 @pytest.fixture(scope="session")
 def file_scraper() -> StardewFileScraper:
-    config_path = Path(__file__).resolve().parent / "configs" / "config_tests.json"
-    config = ConfigLoader(config_path)
+    config = ConfigLoader(CONFIG_PATH)
     return StardewFileScraper(config)
 
 
@@ -68,3 +114,914 @@ def test_fetch_page_redirections_filters_and_deduplicates(file_scraper: StardewF
     blocked_prefixes = ("File:", "Image:", "Category:", "Special:", "Help:", "Talk:", "User:", "Template:")
     assert all(not x.startswith(blocked_prefixes) for x in links)
 
+
+
+def _wiki_page(body: str) -> str:
+    return f'<html><body><div id="mw-content-text"><div class="mw-parser-output">{body}</div></div></body></html>'
+
+
+class _DictScraper(StardewScraper):
+    def __init__(self, config: ConfigLoader, pages: dict[str, str]):
+        super().__init__(config)
+        self.pages = pages
+        self.fetched: list[str] = []
+
+    def fetch_page(self, subpage: str) -> str:
+        self.fetched.append(subpage)
+        if subpage not in self.pages:
+            raise ConnectionError(f"Request error for {subpage}: 404")
+        return self.pages[subpage]
+
+
+@pytest.fixture()
+def linked_pages() -> dict[str, str]:
+    return {
+        "Start": _wiki_page('<p>farm farm crop</p><a href="/Alpha">a</a><a href="/Beta">b</a>'),
+        "Alpha": _wiki_page('<p>crop fish</p><a href="/Gamma">g</a><a href="/Missing">m</a>'),
+        "Beta": _wiki_page('<p>fish</p><a href="/Start">s</a>'),
+        "Gamma": _wiki_page('<p>never reached at depth two</p>'),
+    }
+
+
+@pytest.mark.parametrize("html", [
+    _wiki_page('<a href="/Alpha">a</a><a href="/Beta_page#top">b</a><a href="/alpha">c</a><a href="/Beta page?x=1">d</a>'),
+    _wiki_page('<a href="/File:Nut.png">f</a><a href="/Talk:Nut">t</a><a href="//cdn/x">c</a><a href="/#top">t</a>'
+               '<a href="https://example.com/Away">x</a><a>no href</a><a href="/Gold%C3%A9n_Walnut">g</a>'),
+    '<html><body><a href="/Before">x</a><div id="mw-content-text"><br><img src="/x.png"><p>text<a href="/In">i</a>'
+    '</div><a href="/After">x</a><div id="mw-content-text"><a href="/Second">s</a></div></body></html>',
+    '<html><body><DIV ID="mw-content-text"><table><tr><td><A HREF="/Upper">u</A><p><a href="/Unclosed">'
+    '<li><a href="/Item">i</a></td></tr></table></DIV><a href="/Outside">o</a></body></html>',
+    '<html><body><div id="mw-content-text"><div><div></div><a href="/Nested">n</a></div></div>'
+    '<a href="/Outside">o</a>',
+    '<html><body><p><a href="/Nowhere">x</a></p></body></html>',
+])
+def test_scan_links_matches_parsed_links(html: str) -> None:
+    assert scan_links(html) == content_links(ParsedPage(html).content)
+
+
+def test_scan_links_matches_parsed_links_on_wiki_pages(input_dir: Path) -> None:
+    pages = [path.read_text(encoding="utf-8") for path in input_dir.glob("*.html")]
+    assert pages
+    for html in pages:
+        links = scan_links(html)
+        assert links == content_links(ParsedPage(html).content)
+        assert links == extract_links(html).links
+
+
+def test_discover_pages_lists_titles_without_counting(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path
+) -> None:
+    scraper = _DictScraper(file_scraper.config, linked_pages)
+    out = io.StringIO()
+
+    assert discover_pages("Start", 3, 0, scraper, out) == 4
+    assert out.getvalue().splitlines() == ["Start", "Alpha", "Beta", "Gamma"]
+    assert not (tmp_path / "word-counts.json").exists()
+
+
+def test_token_bucket_spaces_out_requests() -> None:
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_crawl_subpages_concurrent_counts_each_page_once(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path, batch_size: int
+) -> None:
+    scraper = _DictScraper(file_scraper.config, linked_pages)
+    scraper.batch_size = batch_size
+    counts_path = tmp_path / "word-counts.json"
+
+    crawl_subpages("Start", 2, 0, scraper, counts_path, workers=4)
+
+    assert sorted(scraper.fetched) == ["Alpha", "Beta", "Start"]
+    counts = pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict()
+    assert counts == {"farm": 2, "crop": 2, "fish": 2}
+
+
+def test_crawl_records_queryable_link_graph(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path
+) -> None:
+    from xml.etree import ElementTree
+
+    from crawler import LinkGraph
+
+    scraper = _DictScraper(file_scraper.config, linked_pages)
+    graph_dir = tmp_path / "graph"
+
+    crawl_subpages("Start", 2, 0, scraper, tmp_path / "word-counts.json", graph_dir=graph_dir)
+
+    graph = LinkGraph.load(graph_dir)
+    assert isinstance(graph.indices, np.memmap)
+    assert sorted(graph.successors("Alpha")) == ["Gamma", "Missing"]
+    assert (graph.out_degree("Start"), graph.in_degree("Start")) == (2, 1)
+    assert graph.shortest_path("Beta", "Gamma") == ["Beta", "Start", "Alpha", "Gamma"]
+    assert graph.shortest_path("Gamma", "Start") is None
+
+    graph.export(tmp_path / "links.csv")
+    graph.export(tmp_path / "links.graphml")
+    assert len(pd.read_csv(tmp_path / "links.csv")) == graph.edge_count == 5
+    root = ElementTree.parse(tmp_path / "links.graphml").getroot()
+    assert len(root.findall(".//{http://graphml.graphdrawing.org/xmlns}edge")) == 5
+
+
+def test_frontier_orders_by_strategy_and_caps_namespaces() -> None:
+    frontier = InLinkFrontier(seen=BloomFilter(1000), max_per_namespace=2)
+    for title in ["A", "B", "Tips:One", "Tips:Two", "Tips:Three"]:
+        frontier.add(title, 1)
+    assert frontier.add("B", 2) and frontier.add("Tips:Two", 1)
+    assert not frontier.add("Tips:Three", 1)
+
+    assert frontier.pop() == ("B", 1)
+    assert frontier.pop() == ("Tips:Two", 1)
+    assert not frontier.add("B", 1)
+    assert [frontier.pop(), frontier.pop(), frontier.pop()] == [("A", 1), ("Tips:One", 1), None]
+
+
+def test_frontier_spills_to_disk_and_keeps_priority_order(tmp_path: Path) -> None:
+    seen = DiskSeenSet(5, tmp_path)
+    frontier = InLinkFrontier(seen=seen, max_queued=4, spill_dir=tmp_path)
+    for i in range(20):
+        frontier.add(f"Page {i}", 1, inlinks=i % 7)
+    assert frontier.add("Page 0", 1, inlinks=10)
+    assert frontier.add("Page 3", 1, inlinks=0) and len(frontier) == 20
+    assert len(frontier._queued) <= 4 and len(seen._digests) < 5
+
+    popped = [frontier.pop() for _ in range(20)]
+    assert frontier.pop() is None
+    assert popped[0] == ("Page 0", 1)
+    ranks = [10 if title == "Page 0" else int(title.split()[1]) % 7 for title, _ in popped]
+    assert ranks == sorted(ranks, reverse=True)
+    assert not frontier.add("Page 13", 1) and "Page 13" in seen and "Page 99" not in seen
+
+    frontier.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_frontier_stays_bounded_on_equal_priorities(tmp_path: Path) -> None:
+    frontier = BreadthFirstFrontier(max_queued=50, spill_dir=tmp_path)
+    for i in range(1000):
+        frontier.add(f"Page {i}", 1)
+    frontier.add("Deep", 2)
+
+    popped = []
+    while (page := frontier.pop()) is not None:
+        assert len(frontier._queued) <= 50
+        popped.append(page)
+
+    assert len(popped) == 1001 and popped[-1] == ("Deep", 2)
+    assert len({title for title, _ in popped}) == 1001
+    frontier.close()
+
+
+@pytest.mark.parametrize("strategy, expected", [
+    ("bfs", ["Start", "A", "B", "C"]),
+    ("inlinks", ["Start", "A", "B", "Hub"]),
+])
+def test_crawl_limit_follows_frontier_strategy(
+    file_scraper: StardewFileScraper, tmp_path: Path, strategy: str, expected: list[str]
+) -> None:
+    pages = {
+        "Start": _wiki_page('<a href="/A">a</a><a href="/B">b</a><a href="/C">c</a>'),
+        "A": _wiki_page('<a href="/Hub">h</a>'),
+        "B": _wiki_page('<a href="/Hub">h</a>'),
+        "C": _wiki_page('<a href="/Leaf">l</a>'),
+        "Hub": _wiki_page("<p>hub</p>"),
+    }
+    scraper = _DictScraper(file_scraper.config, pages)
+
+    crawl_subpages("Start", 3, 0, scraper, tmp_path / "word-counts.json", limit=4, strategy=strategy)
+
+    assert scraper.fetched == expected
+
+
+def test_crawl_resolves_aliases_and_skips_near_duplicates(
+    file_scraper: StardewFileScraper, tmp_path: Path
+) -> None:
+    article = " ".join(f"walnut{i % 60}" for i in range(120))
+    canonical = '<link rel="canonical" href="https://stardewvalleywiki.com/Golden_Walnut">'
+    pages = {
+        "Start": _wiki_page(
+            '<a href="/golden_walnut">w</a><a href="/Golden_Walnut">g</a><a href="/Walnut_copy">c</a>'
+            '<a href="/Short">s</a>'
+        ),
+        "Golden walnut": _wiki_page(f"<p>{article}</p>").replace("<body>", f"<head>{canonical}</head><body>"),
+        "Golden Walnut": _wiki_page(f"<p>{article}</p>"),
+        "Walnut copy": _wiki_page(f"<p>{article} copied</p>"),
+        "Short": _wiki_page("<p>walnut0</p>"),
+    }
+    scraper = _DictScraper(file_scraper.config, pages)
+    alias_path = tmp_path / "aliases.sqlite"
+
+    crawl_subpages("Start", 3, 0, scraper, tmp_path / "word-counts.json", alias_path=alias_path)
+
+    assert "Golden Walnut" not in scraper.fetched and "Walnut copy" in scraper.fetched
+    counts = pd.read_json(tmp_path / "word-counts.json").set_index("word")["wiki freq"].to_dict()
+    assert counts["walnut0"] == 3 and "copied" not in counts
+    with AliasMap(alias_path) as aliases:
+        assert aliases.resolve("Golden walnut") == "Golden Walnut"
+        assert aliases.resolve("Walnut copy") == "Walnut copy"
+
+
+def test_distributed_crawl_shares_pages_and_merges_counts(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path
+) -> None:
+    queue_path = tmp_path / "queue.sqlite"
+    counts_path = tmp_path / "word-counts.json"
+    scrapers = [_DictScraper(file_scraper.config, linked_pages) for _ in range(2)]
+
+    def run_node(index: int) -> None:
+        with SqliteWorkQueue(queue_path) as queue, WordCountStore(tmp_path / f"node{index}.sqlite") as store:
+            crawl_node("Start", 2, 0, scrapers[index], counts_path, queue, f"node{index}",
+                       shard=(index, 2), store=store)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(run_node, range(2)))
+
+    assert sorted(scrapers[0].fetched + scrapers[1].fetched) == ["Alpha", "Beta", "Start"]
+    counts = pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict()
+    assert counts == {"farm": 2, "crop": 2, "fish": 2}
+
+    # Crawling again into the same store replaces the pages' counts rather than adding to them.
+    with SqliteWorkQueue(queue_path) as queue, WordCountStore(tmp_path / "solo.sqlite") as store:
+        for _ in range(2):
+            crawl_node("Start", 2, 0, scrapers[0], counts_path, queue, "solo", store=store)
+        assert [title for title, _ in store.page_records()] == ["Alpha", "Beta", "Start"]
+    assert pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict() == counts
+
+
+def test_work_queue_reassigns_expired_leases(tmp_path: Path) -> None:
+    with SqliteWorkQueue(tmp_path / "queue.sqlite", lease=0) as queue:
+        queue.start("Start", 2)
+        assert queue.claim("dead", 5) == [("Start", 0)]
+        assert queue.claim("alive", 5) == [("Start", 0)]
+
+        assert queue.complete("dead", [CompletedPage("Start", 0, "done", {"lost": 1}, ["Lost"])]) == 0
+        assert queue.complete("alive", [CompletedPage("Start", 0, "done", {"farm": 2}, ["Alpha"], 7)]) == 1
+        assert not queue.finished() and queue.take_pages() is None
+        assert queue.claim("alive", 5) == [("Alpha", 1)]
+        queue.complete("alive", [CompletedPage("Alpha", 1, "done", {"farm": 1, "crop": 1}, ["Gamma"])])
+
+        assert queue.finished()
+        assert queue.take_pages() == [("Alpha", {"farm": 1, "crop": 1}, None), ("Start", {"farm": 2}, 7)]
+        assert queue.take_pages() is None
+
+
+def test_work_queue_refuses_another_crawl_in_progress(tmp_path: Path) -> None:
+    with SqliteWorkQueue(tmp_path / "queue.sqlite") as queue:
+        assert not queue.start("Start", 2)
+        assert queue.start("Start", 2)
+        for start, depth in (("Other", 2), ("Start", 3)):
+            with pytest.raises(ValueError, match="another crawl"):
+                queue.start(start, depth)
+        assert queue.claim("node", 5) == [("Start", 0)]
+
+        assert not queue.start("Other", 1, reset=True)
+        assert queue.claim("node", 5) == [("Other", 0)]
+
+
+class _StubWiki:
+    def __init__(self) -> None:
+        self.routes: dict[str, tuple[int, dict[str, str], bytes]] = {}
+        self.apis: dict[str, Callable[[dict[str, str]], dict]] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.gzip_paths: set[str] = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                stub.requests.append((self.path, dict(self.headers)))
+                url = urlsplit(self.path)
+                if url.path in stub.apis:
+                    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    reply = json.dumps(stub.apis[url.path](query)).encode()
+                    status, headers, body = 200, {"Content-Type": "application/json"}, reply
+                else:
+                    status, headers, body = stub.routes.get(self.path, (404, {}, b"not found"))
+                if self.path in stub.gzip_paths and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    headers, body = {**headers, "Content-Encoding": "gzip"}, gzip.compress(body)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add_page(self, path: str, html: str, status: int = 200, **headers: str) -> None:
+        self.routes[path] = (status, {"Content-Type": "text/html; charset=utf-8", **headers}, html.encode())
+
+
+@pytest.fixture()
+def stub_wiki():
+    stub = _StubWiki()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture()
+def online_scraper(stub_wiki: _StubWiki) -> StardewScraper:
+    config = ConfigLoader(CONFIG_PATH)
+    config.config.update({"wiki_url": stub_wiki.url, "max_retries": 0})
+    return StardewScraper(config)
+
+
+def test_fetch_page_makes_single_request(online_scraper: StardewScraper, stub_wiki: _StubWiki) -> None:
+    stub_wiki.add_page("/Golden_Walnut", _wiki_page("<p>Golden Walnuts are the currency of the parrots.</p>"))
+
+    html = online_scraper.fetch_page("Golden Walnut")
+
+    assert "currency of the parrots" in html
+    assert [path for path, _ in stub_wiki.requests] == ["/Golden_Walnut"]
+    assert stub_wiki.requests[0][1]["User-Agent"] == "WikiScraper/0.1.0"
+
+
+def test_fetch_page_falls_back_only_on_404(online_scraper: StardewScraper, stub_wiki: _StubWiki) -> None:
+    stub_wiki.add_page("/Walnut", _wiki_page("<p>Golden Walnut</p>"))
+    online_scraper._fallback_fetch_url = lambda phrase: f"{stub_wiki.url}/Walnut"
+
+    assert "Golden Walnut" in online_scraper.fetch_page("Golden Walnuts")
+    assert [path for path, _ in stub_wiki.requests] == ["/Golden_Walnuts", "/Walnut"]
+
+    stub_wiki.add_page("/Broken", "oops", status=500)
+    with pytest.raises(ConnectionError):
+        online_scraper.fetch_page("Broken")
+    assert stub_wiki.requests[-1][0] == "/Broken"
+
+
+def test_fetch_page_without_fallback_key_is_not_found(
+    online_scraper: StardewScraper, stub_wiki: _StubWiki, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delitem(online_scraper.config.api_keys, "X-API-KEY", raising=False)
+
+    with pytest.raises(PageNotFound, match="X-API-KEY"):
+        online_scraper.fetch_page("Nowhere")
+    assert [path for path, _ in stub_wiki.requests] == ["/Nowhere"]
+
+
+@pytest.mark.parametrize("html", [
+    _wiki_page("<p>Short.</p><p>Golden <b>Walnuts</b> are the currency , of the <!-- x -->parrots on Ginger Island .</p>"),
+    _wiki_page("<table><tr><td><p>Paragraphs in tables count too, once they are long enough.</td></tr></table>"),
+    _wiki_page("<p>Script <script>var hidden = 'not part of the text at all';</script>text stays short</p>"
+               "<p>The   second\nparagraph carries   the summary</p>"),
+    '<html><body><p>Outside the content div, long enough to qualify.</p></body></html>',
+    '<html><body><div id="mw-content-text"><p>short</p></div>'
+    '<div id="mw-content-text"><p>A second content div is never looked at by either.</p></div></body></html>',
+    '<html><body><div id="mw-content-text"><p>Unclosed paragraph running to the end of the page',
+])
+@pytest.mark.parametrize("chunk_size", [5, 1 << 20])
+def test_summary_scanner_matches_parse_summary(
+    file_scraper: StardewFileScraper, html: str, chunk_size: int
+) -> None:
+    scanner = SummaryScanner()
+    for i in range(0, len(html), chunk_size):
+        if scanner.feed(html[i:i + chunk_size]):
+            break
+    scanner.close()
+    try:
+        expected = file_scraper.parse_summary(html)
+    except ValueError as e:
+        with pytest.raises(ValueError, match=str(e)):
+            scanner.result()
+    else:
+        assert scanner.result() == expected
+
+
+def test_fetch_summary_stops_reading_after_summary(
+    online_scraper: StardewScraper, stub_wiki: _StubWiki, file_scraper: StardewFileScraper, input_dir: Path
+) -> None:
+    tail = "".join(f"<p>filler paragraph {i} with some more words in it</p>" for i in range(20_000))
+    html = _wiki_page(f"<p>Robin is the carpenter who lives in the mountains.</p>{tail}")
+    stub_wiki.add_page("/Robin", html)
+    metrics.reset()
+
+    assert online_scraper.fetch_summary("Robin") == "Robin is the carpenter who lives in the mountains."
+    assert metrics.counters["streams_closed_early"] == 1
+    assert metrics.counters["bytes_downloaded"] < len(html) / 10
+
+    for path in input_dir.glob("*.html"):
+        title = path.stem.replace("_", " ")
+        assert file_scraper.fetch_summary(title) == file_scraper.parse_summary(path.read_text(encoding="utf-8"))
+
+
+def _fake_api(query: dict[str, str]) -> dict:
+    if query["action"] == "parse":
+        if query["page"] != "Golden Walnut":
+            return {"error": {"code": "missingtitle", "info": "The page doesn't exist."}}
+        return {"parse": {"title": "Golden Walnut", "text": "<p>Golden Walnuts are the currency of the parrots.</p>"}}
+    titles = query["titles"].split("|")
+    pages = []
+    if "Golden Walnut" in titles or "Walnuts" in titles:
+        pages.append({
+            "title": "Golden Walnut",
+            "revisions": [{"slots": {"main": {"content": "'''Golden Walnuts''' are paid to [[Parrot|parrots]]."}}}],
+            "links": [{"ns": 0, "title": "Parrot"}],
+        })
+    if "Nowhere" in titles:
+        pages.append({"title": "Nowhere", "missing": True})
+    return {"batchcomplete": True, "query": {"redirects": [{"from": "Walnuts", "to": "Golden Walnut"}], "pages": pages}}
+
+
+def test_mediawiki_api_batches_titles(stub_wiki: _StubWiki, tmp_path: Path) -> None:
+    config = ConfigLoader(CONFIG_PATH)
+    config.config.update({"wiki_url": stub_wiki.url, "api_url": f"{stub_wiki.url}/api.php", "max_retries": 0})
+    stub_wiki.apis["/api.php"] = _fake_api
+    scraper = MediaWikiApiScraper(config)
+
+    pages = scraper.fetch_pages(["Walnuts", "Golden Walnut", "Nowhere"])
+
+    assert len(stub_wiki.requests) == 1
+    assert set(pages) == {"Walnuts", "Golden Walnut"}
+    assert scraper.fetch_page_redirections(pages["Walnuts"]) == ["Parrot"]
+    assert scraper.count_all_words(pages["Walnuts"])["parrots"] == 1
+    assert "currency of the parrots" in scraper.parse_summary(scraper.fetch_page("Golden Walnut"))
+    with pytest.raises(PageNotFound):
+        scraper.fetch_page("Nowhere")
+
+    # Counted pages come from the batched query even when fetched alone, not from action=parse.
+    crawl_subpages("Golden Walnut", 1, 0, scraper, tmp_path / "word-counts.json")
+    counts = pd.read_json(tmp_path / "word-counts.json").set_index("word")["wiki freq"].to_dict()
+    assert counts["paid"] == 1 and "currency" not in counts
+
+    stub_wiki.apis["/api.php"] = lambda query: {"error": {"code": "maxlag", "info": "Waiting for a database server"}}
+    with pytest.raises(RuntimeError, match="maxlag"):
+        scraper.fetch_page("Golden Walnut")
+
+
+def test_count_all_pages_follows_continuation(stub_wiki: _StubWiki, tmp_path: Path) -> None:
+    # Farm's links span two responses of the first batch; Fish comes in the next batch.
+    responses = {
+        "": {"continue": {"plcontinue": "1|0|Fish", "continue": "||"}, "query": {"pages": [
+            {"title": "Farm", "revisions": [{"revid": 3, "slots": {"main": {"content": "farm farm"}}}],
+             "links": [{"ns": 0, "title": "Crop"}]},
+            {"title": "Crop", "revisions": [{"revid": 5, "slots": {"main": {"content": "crop"}}}]},
+        ]}},
+        "1|0|Fish": {"batchcomplete": True, "continue": {"gapcontinue": "Fish", "continue": "gapcontinue||"},
+                     "query": {"pages": [{"title": "Farm", "links": [{"ns": 0, "title": "Fish"}]}]}},
+        "Fish": {"batchcomplete": True, "query": {"pages": [
+            {"title": "Fish", "revisions": [{"revid": 7, "slots": {"main": {"content": "fish"}}}]},
+        ]}},
+    }
+    config = ConfigLoader(CONFIG_PATH)
+    config.config.update({"wiki_url": stub_wiki.url, "api_url": f"{stub_wiki.url}/api.php", "max_retries": 0})
+    stub_wiki.apis["/api.php"] = lambda query: responses[query.get("plcontinue") or query.get("gapcontinue", "")]
+    scraper = MediaWikiApiScraper(config)
+
+    pages = dict(scraper.iter_all_pages())
+    assert list(pages) == ["Farm", "Crop", "Fish"]
+    assert scraper.extractor()(pages["Farm"]).links == ["Crop", "Fish"]
+
+    counts_path = tmp_path / "word-counts.json"
+    with WordCountStore(tmp_path / "counts.sqlite") as store:
+        assert count_all_pages(scraper, counts_path, limit=2, store=store) == 2
+        assert count_all_pages(scraper, counts_path, store=store) == 3
+        assert list(store.page_records()) == [("Crop", 5), ("Farm", 3), ("Fish", 7)]
+    assert pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict() == {"farm": 2, "crop": 1, "fish": 1}
+
+
+def test_word_store_replaces_page_counts(tmp_path: Path) -> None:
+    with WordCountStore(tmp_path / "counts.sqlite") as store:
+        assert store.set_page("Farm", {"farm": 2, "crop": 1}, revision=1)
+        store.add({"farm": 1})
+        assert not store.set_page("Farm", {"crop": 1, "farm": 2}, revision=2)
+        assert store.set_page("Farm", {"farm": 1, "fish": 3}, revision=3)
+        store.flush()
+        assert store.set_page("Farm", {"farm": 1, "fish": 4}, revision=4)
+        assert list(store.page_records()) == [("Farm", 4)]
+        assert store.to_frame().set_index("word")["wiki freq"].to_dict() == {"fish": 4, "farm": 2}
+
+        assert store.remove_page("Farm") and not store.remove_page("Farm")
+        assert store.to_frame().set_index("word")["wiki freq"].to_dict() == {"farm": 1}
+        assert list(store.page_records()) == []
+
+
+def test_refresh_recounts_only_changed_revisions(stub_wiki: _StubWiki, tmp_path: Path) -> None:
+    wiki = {"Farm": (1, "farm farm", ["Crop", "Fish"]), "Crop": (1, "crop", []), "Fish": (1, "fish", [])}
+
+    def api(query: dict[str, str]) -> dict:
+        if query["action"] == "parse":
+            revid, text, links = wiki[query["page"]]
+            anchors = "".join(f'<a href="/{link}"></a>' for link in links)
+            return {"parse": {"title": query["page"], "revid": revid, "text": f"<p>{text}</p>{anchors}"}}
+        pages = []
+        for title in query["titles"].split("|"):
+            if title not in wiki:
+                pages.append({"title": title, "missing": True})
+                continue
+            revid, text, links = wiki[title]
+            if query["prop"] == "info":
+                pages.append({"title": title, "lastrevid": revid})
+            else:
+                pages.append({
+                    "title": title,
+                    "revisions": [{"revid": revid, "slots": {"main": {"content": text}}}],
+                    "links": [{"ns": 0, "title": link} for link in links],
+                })
+        return {"batchcomplete": True, "query": {"pages": pages}}
+
+    config = ConfigLoader(CONFIG_PATH)
+    config.config.update({"wiki_url": stub_wiki.url, "api_url": f"{stub_wiki.url}/api.php", "max_retries": 0})
+    stub_wiki.apis["/api.php"] = api
+    scraper = MediaWikiApiScraper(config)
+    counts_path = tmp_path / "word-counts.json"
+    with WordCountStore(tmp_path / "counts.sqlite") as store:
+        crawl_subpages("Farm", 2, 0, scraper, counts_path, store=store)
+        crawl_subpages("Farm", 2, 0, scraper, counts_path, store=store)
+        assert list(store.page_records()) == [("Crop", 1), ("Farm", 1), ("Fish", 1)]
+
+        wiki["Crop"] = (2, "crop crop parsnip", [])
+        del wiki["Fish"]
+        stub_wiki.requests.clear()
+        refresh_counts(scraper, counts_path, store=store)
+
+    fetched = [parse_qs(urlsplit(path).query) for path, _ in stub_wiki.requests]
+    assert [(query["prop"][0], query["titles"][0]) for query in fetched] == [
+        ("info", "Crop|Farm|Fish"), ("revisions|links", "Crop|Fish"),
+    ]
+    counts = pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict()
+    assert counts == {"farm": 2, "crop": 2, "parsnip": 1}
+
+    wiki["Crop"] = (3, "crop", [])
+    wiki["Farm"] = (2, "farm", [])
+    maxlag = {"error": {"code": "maxlag", "info": "Waiting for a database server"}}
+    stub_wiki.apis["/api.php"] = lambda query: api(query) if query.get("prop") == "info" else maxlag
+    with WordCountStore(tmp_path / "counts.sqlite") as store:
+        refresh_counts(scraper, counts_path, store=store)
+        assert list(store.page_records()) == [("Crop", 2), ("Farm", 1)]
+    assert pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict() == counts
+
+
+def test_language_frequencies_match_wordfreq(tmp_path: Path) -> None:
+    from wordfreq import word_frequency
+
+    from analysis import LanguageFrequencies
+
+    words = pd.Series(["the", "farm", "it's", "1999", "stardew", "zzqxj", "well-known", "café", "Farm", "ﬁsh"])
+    built = LanguageFrequencies.load("en", tmp_path).lookup(words)
+    cached = LanguageFrequencies.load("en", tmp_path)
+
+    assert isinstance(cached.words, np.memmap)
+    assert cached.lookup(words) == pytest.approx(built)
+    assert built == pytest.approx([word_frequency(w, "en") for w in words])
+
+    german = ["straße", "groß", "weiß", "heißt", "Haus"]
+    assert LanguageFrequencies.load("de", tmp_path).lookup(german) == pytest.approx(
+        [word_frequency(w, "de") for w in german]
+    )
+
+
+def test_parsed_page_serves_all_extractors(file_scraper: StardewFileScraper, input_dir: Path) -> None:
+    html = _read_html(input_dir, "Oasis")
+    page = file_scraper.parse_page(html)
+
+    assert file_scraper.parse_summary(page) == file_scraper.parse_summary(html)
+    assert file_scraper.fetch_page_redirections(page) == file_scraper.fetch_page_redirections(html)
+    assert file_scraper.extract_all_words(page).equals(file_scraper.extract_all_words(html))
+    assert len(file_scraper.extract_tables(page)) == len(file_scraper.extract_tables(html))
+
+
+def test_word_count_store_upserts_and_exports(tmp_path: Path) -> None:
+    json_path = tmp_path / "word-counts.json"
+    pd.DataFrame({"word": ["farm", "crop"], "wiki freq": [3, 1]}).to_json(json_path, orient="records")
+
+    with WordCountStore.for_json(json_path) as store:
+        store.add({"crop": 4, "fish": 2})
+        store.add({"farm": 1})
+        store.export_json(json_path)
+
+    exported = pd.read_json(json_path)
+    assert exported.to_dict("records") == [
+        {"word": "crop", "wiki freq": 5},
+        {"word": "farm", "wiki freq": 4},
+        {"word": "fish", "wiki freq": 2},
+    ]
+    assert TextAnalyzer.load_word_counts(tmp_path / "word-counts.sqlite").equals(exported)
+
+
+def test_page_cache_revalidates_and_serves_offline(
+    online_scraper: StardewScraper, stub_wiki: _StubWiki, tmp_path: Path
+) -> None:
+    online_scraper.cache = PageCache(tmp_path / "cache", ttl=0)
+    stub_wiki.add_page("/Robin", _wiki_page("<p>Robin is the carpenter.</p>"), ETag='"v1"')
+
+    first = online_scraper.fetch_page("Robin")
+    stub_wiki.add_page("/Robin", "", status=304)
+    second = online_scraper.fetch_page("Robin")
+
+    assert first == second
+    assert stub_wiki.requests[1][1]["If-None-Match"] == '"v1"'
+
+    online_scraper.cache.offline = True
+    assert online_scraper.fetch_page("Robin") == first
+    assert len(stub_wiki.requests) == 2
+    with pytest.raises(ConnectionError):
+        online_scraper.fetch_page("Pierre")
+
+
+def test_fetch_page_requests_compressed_responses(
+    online_scraper: StardewScraper, stub_wiki: _StubWiki, tmp_path: Path
+) -> None:
+    html = _wiki_page("".join(f"<p>Robin sells wood and stone, day {i}.</p>" for i in range(500)))
+    stub_wiki.add_page("/Robin", html)
+    stub_wiki.gzip_paths.add("/Robin")
+    metrics.reset()
+
+    assert online_scraper.fetch_page("Robin") == html
+    headers = stub_wiki.requests[0][1]
+    assert "gzip" in headers["Accept-Encoding"]
+    assert headers["Accept-Language"] == "en-US,en;q=0.9"
+    assert metrics.counters["bytes_downloaded"] == len(gzip.compress(html.encode()))
+
+    cache = PageCache(tmp_path / "cache", compression="gzip")
+    cache.put("Robin", html)
+    assert cache.get("Robin").text == html
+    assert cache.total_bytes() < len(html) / 10
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path / "cache", max_bytes=25)
+    cache.put("a", "a" * 10)
+    cache.put("b", "b" * 10)
+    cache.get("a")
+    cache.put("c", "c" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a").text == "a" * 10
+    assert cache.total_bytes() == 20
+
+
+def test_crawl_resume_continues_without_double_counting(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path
+) -> None:
+    counts_path = tmp_path / "word-counts.json"
+    journal_path = tmp_path / "crawl.sqlite"
+
+    first = _DictScraper(file_scraper.config, linked_pages)
+    crawl_subpages("Start", 2, 0, first, counts_path, limit=1, journal_path=journal_path)
+    assert first.fetched == ["Start"]
+
+    second = _DictScraper(file_scraper.config, linked_pages)
+    crawl_subpages("Start", 2, 0, second, counts_path, journal_path=journal_path, resume=True)
+
+    assert sorted(second.fetched) == ["Alpha", "Beta"]
+    counts = pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict()
+    assert counts == {"farm": 2, "crop": 2, "fish": 2}
+
+
+def test_count_all_words_matches_dataframe_pipeline(file_scraper: StardewFileScraper) -> None:
+    html = _wiki_page(
+        "<p>Pierre's shop: 'Open' 9AM–5PM, 1999 “Gus” x -- it's Pierre's!</p>"
+        "<style>.hidden { color: red }</style><script>var ignored = 1;</script><p>''  shop</p>"
+    )
+
+    counts = file_scraper.count_all_words(html)
+    frame = TextAnalyzer.sum_word_occurrences(file_scraper.extract_all_words(html))
+
+    assert counts == {"pierre's": 2, "shop": 2, "open": 1, "9am": 1, "5pm": 1, "gus": 1, "it's": 1}
+    assert dict(zip(frame["word"], frame["wiki freq"])) == counts
+    assert next(file_scraper.iter_all_words(html)) == "pierre's"
+
+
+def test_ingest_counts_directories_archives_and_dumps(tmp_path: Path) -> None:
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    (pages_dir / "Ice_Cream.html").write_text(_wiki_page("<p>Ice cream is sweet</p>"), encoding="utf-8")
+    (pages_dir / "Coffee.html").write_text(_wiki_page("<p>Coffee is bitter</p>"), encoding="utf-8")
+
+    archive_path = tmp_path / "pages.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        archive.add(pages_dir, arcname="snapshot")
+
+    dump_path = tmp_path / "dump.xml.bz2"
+    dump_path.write_bytes(bz2.compress(
+        b'<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/">'
+        b"<page><title>Coffee</title><ns>0</ns><revision><text>'''Coffee''' is [[Drinks|bitter]]"
+        b"{{Infobox|hidden}}</text></revision></page>"
+        b"<page><title>Old</title><ns>0</ns><redirect title='Coffee'/><revision><text>#REDIRECT [[Coffee]]"
+        b"</text></revision></page></mediawiki>"
+    ))
+
+    expected = {"ice": 1, "cream": 1, "is": 2, "sweet": 1, "coffee": 1, "bitter": 1}
+    for source in (pages_dir, archive_path):
+        with WordCountStore(tmp_path / f"{source.name}.sqlite") as store:
+            assert ingest(source, store, workers=2, chunksize=1) == 2
+            assert dict(zip(*store.to_frame().T.values)) == expected
+            assert ingest(source, store, workers=1) == 2
+            assert dict(zip(*store.to_frame().T.values)) == expected
+
+    with WordCountStore(tmp_path / "dump.sqlite") as store:
+        assert ingest(dump_path, store, workers=1) == 1
+        assert dict(zip(*store.to_frame().T.values)) == {"coffee": 1, "is": 1, "bitter": 1}
+
+
+def test_compressed_snapshots_read_like_plain_ones(
+    file_scraper: StardewFileScraper, input_dir: Path, tmp_path: Path
+) -> None:
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    for path in input_dir.glob("*.html"):
+        (pages_dir / path.name).write_bytes(path.read_bytes())
+    with WordCountStore(tmp_path / "plain.sqlite") as store:
+        ingest(pages_dir, store, workers=1)
+        expected = dict(zip(*store.to_frame().T.values))
+
+    files, before, after = compress_snapshots(pages_dir, "gzip")
+
+    assert files == len(list(input_dir.glob("*.html")))
+    assert after < before / 3
+    assert not list(pages_dir.glob("*.html"))
+    config = ConfigLoader(CONFIG_PATH)
+    config.config["html_path"] = str(pages_dir)
+    compressed_scraper = StardewFileScraper(config)
+    for path in input_dir.glob("*.html"):
+        title = path.stem.replace("_", " ")
+        assert compressed_scraper.fetch_page(title) == file_scraper.fetch_page(title)
+        assert compressed_scraper.fetch_summary(title) == file_scraper.fetch_summary(title)
+    with WordCountStore(tmp_path / "compressed.sqlite") as store:
+        assert ingest(pages_dir, store, workers=1) == files
+        assert dict(zip(*store.to_frame().T.values)) == expected
+
+
+def test_zstd_snapshots_share_a_dictionary_and_survive_interruption(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pytest.importorskip("zstandard")
+    from scraper import compression
+
+    navbox = "<div class='navbox'>Crops Seeds Fruit Trees Vegetables Flowers Forage</div>" * 5
+    seasons = ["spring", "summer", "fall"]
+    pages = {
+        f"Crop_{i}": _wiki_page(f"<p>Crop {i} grows in {seasons[i % 3]} and sells for {i * 7}g.</p>{navbox}")
+        for i in range(200)
+    }
+    for name, html in pages.items():
+        (tmp_path / f"{name}.html").write_text(html, encoding="utf-8")
+
+    files, before, after = compress_snapshots(tmp_path, "zstd")
+    first_ids = set(compression.read_dictionaries(tmp_path))
+    assert files == 200 and after < before / 4 and len(first_ids) == 1
+
+    written = 0
+    real_write_html = compression.write_html
+
+    def failing_write_html(*args, **kwargs) -> int:
+        nonlocal written
+        if written == 100:
+            raise OSError("disk full")
+        written += 1
+        return real_write_html(*args, **kwargs)
+
+    monkeypatch.setattr(compression, "write_html", failing_write_html)
+    with pytest.raises(OSError):
+        compress_snapshots(tmp_path, "zstd")
+    assert len(compression.read_dictionaries(tmp_path)) == 2
+    for name, html in pages.items():
+        assert compression.read_html(tmp_path / f"{name}.html.zst") == html
+
+    monkeypatch.setattr(compression, "write_html", real_write_html)
+    assert compress_snapshots(tmp_path, "zstd")[0] == 200
+    assert len(compression.read_dictionaries(tmp_path)) == 1
+    assert not set(compression.read_dictionaries(tmp_path)) & first_ids
+    config = ConfigLoader(CONFIG_PATH)
+    config.config["html_path"] = str(tmp_path)
+    assert StardewFileScraper(config).fetch_page("Crop 42") == pages["Crop_42"]
+
+
+def test_crawl_subpages_parses_in_worker_processes(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str], tmp_path: Path
+) -> None:
+    scraper = _DictScraper(file_scraper.config, linked_pages)
+    counts_path = tmp_path / "word-counts.json"
+
+    crawl_subpages("Start", 3, 0, scraper, counts_path, workers=2, parse_workers=2)
+
+    assert sorted(scraper.fetched) == ["Alpha", "Beta", "Gamma", "Missing", "Start"]
+    counts = pd.read_json(counts_path).set_index("word")["wiki freq"].to_dict()
+    assert counts == {"farm": 2, "crop": 2, "fish": 2, "never": 1, "reached": 1, "at": 1, "depth": 1, "two": 1}
+
+
+def test_metrics_record_fetches_and_export_prometheus(
+    online_scraper: StardewScraper, stub_wiki: _StubWiki, tmp_path: Path
+) -> None:
+    stub_wiki.add_page("/Robin", _wiki_page("<p>Robin is the carpenter.</p>"))
+    stub_wiki.add_page("/Broken", "oops", status=500)
+    metrics.reset()
+    snapshots = []
+    metrics.add_sink(snapshots.append)
+    try:
+        online_scraper.count_all_words(online_scraper.fetch_page("Robin"))
+        with pytest.raises(ConnectionError):
+            online_scraper.fetch_page("Broken")
+        PrometheusFileSink(tmp_path / "metrics.prom")(metrics.snapshot())
+        metrics.emit()
+    finally:
+        metrics.sinks.clear()
+
+    counters = snapshots[0]["counters"]
+    assert counters["http_requests"] == 2
+    assert counters["bytes_downloaded"] > 0
+    assert counters["fetch_page_errors"] == 1
+    assert snapshots[0]["histograms"]["count_all_words_seconds"]["count"] == 1
+    assert 'wikiscraper_fetch_page_seconds_bucket{le="+Inf"} 2' in (tmp_path / "metrics.prom").read_text()
+
+
+def test_profiler_handles_concurrent_stages(tmp_path: Path) -> None:
+    profiler = Profiler()
+    barrier = threading.Barrier(3)
+
+    def work() -> int:
+        with profiler.stage("fetch_page"):
+            barrier.wait(timeout=5)
+            with profiler.stage("parse"):
+                return sum(range(1000))
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = [future.result() for future in [pool.submit(work) for _ in range(3)]]
+
+    assert results == [499500] * 3
+    dumped = {path.name for path in profiler.dump(tmp_path)}
+    assert "fetch_page.prof" in dumped and dumped <= {"fetch_page.prof", "parse.prof"}
+
+
+def test_cli_import_does_not_load_heavy_dependencies() -> None:
+    probe = (
+        "import sys, wikiscraper.main; "
+        "print(sorted(m for m in ('pandas', 'matplotlib', 'seaborn', 'wordfreq') if m in sys.modules))"
+    )
+    src_dir = Path(__file__).resolve().parent.parent / "src"
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        env={**os.environ, "PYTHONPATH": str(src_dir)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+_SPANNED_TABLES = _wiki_page(
+    '<table class="wikitable sortable">'
+    '<tr><th>Crop</th><th colspan="2">Price</th><th>Season</th></tr>'
+    '<tr><th>Parsnip</th><td>35</td><td>1,750</td><td rowspan="2">Spring</td></tr>'
+    '<tr><th>Kale</th><td>110</td><td>5,500<span style="display:none">hidden</span></td></tr>'
+    '<tr><th>Melon</th><td></td><td>250</td><td>Summer</td></tr>'
+    '</table>'
+    '<table class="wikitable"><tr><td>Fish</td><td>Location</td></tr><tr><td>Carp</td><td>Mountain</td></tr></table>'
+)
+
+
+def test_extract_tables_matches_read_html(file_scraper: StardewFileScraper) -> None:
+    expected = [
+        pd.read_html(io.StringIO(_SPANNED_TABLES), header=0, index_col=0)[0],
+        pd.read_html(io.StringIO(_SPANNED_TABLES), header=0)[1],
+    ]
+
+    tables = file_scraper.extract_tables(_SPANNED_TABLES)
+
+    assert len(tables) == 2
+    for table, reference in zip(tables, expected):
+        pd.testing.assert_frame_equal(table, reference)
+    pd.testing.assert_frame_equal(file_scraper.extract_table(_SPANNED_TABLES, 2), expected[1])
+    with pytest.raises(ValueError):
+        file_scraper.extract_table(_SPANNED_TABLES, 3)
+
+
+def test_batch_runner_exports_every_table(
+    file_scraper: StardewFileScraper, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    scraper = _DictScraper(file_scraper.config, {"Crops": _SPANNED_TABLES})
+
+    records = list(BatchRunner(scraper, "tables").run(["Crops"]))
+
+    assert records == [{"page": "Crops", "tables": 2, "paths": ["Crops_1.csv", "Crops_2.csv"], "rows": 4}]
+    assert pd.read_csv(tmp_path / "Crops_1.csv")["Season"].tolist() == ["Spring", "Spring", "Summer"]
+    out = io.StringIO()
+    write_records(records, "tables", "csv", out)
+    assert json.loads(pd.read_csv(io.StringIO(out.getvalue()))["paths"][0]) == ["Crops_1.csv", "Crops_2.csv"]
+
+
+def test_batch_runner_streams_records_and_aggregates_counts(
+    file_scraper: StardewFileScraper, linked_pages: dict[str, str]
+) -> None:
+    runner = BatchRunner(_DictScraper(file_scraper.config, linked_pages), "count-words", workers=3)
+    out = io.StringIO()
+
+    written = write_records(runner.run(["Start", "Missing", "Beta"]), "count-words", "jsonl", out)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert written == 3
+    assert [r["page"] for r in records] == ["Start", "Missing", "Beta"]
+    assert records[0] == {"page": "Start", "words": 3, "unique": 2}
+    assert "error" in records[1]
+    assert runner.page_counts == {"Start": ({"farm": 2, "crop": 1}, None), "Beta": ({"fish": 1}, None)}